@@ -1,14 +1,116 @@
 import streamlit as st
+import streamlit.components.v1 as components
 import pandas as pd
 import time
 import json
-from app.db import upsert_project, get_project_by_code, list_project_codes, list_comments
-from app.utils import load_css, get_base64_image_data, kshitij_logo_svg
+from urllib.parse import quote
+from app.db import upsert_project, ProjectVersionConflict, list_project_codes, list_comments, search_comments, data_version, BULK_PROJECT_FIELDS, list_project_summaries, list_weekly_comment_counts, list_top_reviewers
+from app.cache import get_project
+from app import perf, sessions, push
+from app.export import export_bytes, EXPORT_MAX_BYTES, FORMATS as EXPORT_FORMATS
+from app.bulk_import import import_projects
+from app.utils import store_uploaded_image, store_uploaded_images, uploaded_file_ref, image_bytes
+from app.assets import load_css, icon_html
 import os
+from datetime import date, timedelta
+
+# Number of most recent comments kept in the admin live view
+COMMENTS_VIEW_LIMIT = 500
+LIVE_REFRESH_SECONDS = 10
+SEARCH_PAGE_SIZE = 50
+ACTIVITY_WEEKS = 52
+TOP_REVIEWERS = 10
+
+def load_comments_frame(project_code):
+    """
+    Returns the live comments DataFrame for a project, newest first. The frame is kept in
+    session state and only comments newer than the last seen id are fetched on each refresh.
+    Session state is read once into locals: an idle sweep from another session may evict it.
+    """
+    state = st.session_state
+    df, last_id = state.get('comments_df'), state.get('comments_last_id')
+    if df is None or last_id is None or state.get('comments_project_code') != project_code:
+        rows = list_comments(project_code, page_size=COMMENTS_VIEW_LIMIT)
+        df = pd.DataFrame(rows, columns=["id", "Client", "Comment", "Timestamp (UTC)"])
+        state['comments_project_code'] = project_code
+        state['comments_last_id'] = rows[0]["id"] if rows else 0
+        state['comments_df'] = df
+        return df
+
+    new_rows = []
+    while True:
+        page = list_comments(project_code, after_id=last_id, page_size=COMMENTS_VIEW_LIMIT)
+        if not page:
+            break
+        new_rows = page + new_rows
+        last_id = page[0]["id"]
+        if len(page) < COMMENTS_VIEW_LIMIT:
+            break
+    if new_rows:
+        new_df = pd.DataFrame(new_rows, columns=df.columns)
+        df = pd.concat([new_df, df] if not df.empty else [new_df], ignore_index=True).head(COMMENTS_VIEW_LIMIT)
+    state['comments_last_id'] = last_id
+    state['comments_df'] = df
+    return df
+
+def comments_panel(project_code):
+    """Live comments table. Skips the database when nothing has been committed since the last run."""
+    # Timed fragment reruns skip streamlit_app.py, so mark the session active here as well
+    sessions.touch("admin")
+    version = data_version(project_code)
+    df = st.session_state.get('comments_df')
+    if df is None or st.session_state.get('comments_data_version') != version or st.session_state.get('comments_project_code') != project_code:
+        df = load_comments_frame(project_code)
+        st.session_state['comments_data_version'] = version
+
+    if not df.empty:
+        st.dataframe(df, width="stretch", height=300, hide_index=True, column_config={"id": None})
+    else:
+        st.info("No comments yet for this project.")
+
+def live_comments_html(project_code):
+    """
+    Live comments table fed by the push service (app/push.py) over Server-Sent Events.
+    The browser keeps the connection, so an open tab costs the database nothing.
+    """
+    stream_url = (
+        f"{push.PUSH_URL}/events/comments?project={quote(project_code)}"
+        f"&token={quote(push.make_token(project_code))}&backlog={COMMENTS_VIEW_LIMIT}"
+    )
+    return f"""
+    <style>
+        body {{ margin: 0; font-family: sans-serif; color: #FFFFFF; background: transparent; }}
+        #status {{ font-size: 12px; color: #888; margin-bottom: 4px; }}
+        table {{ width: 100%; border-collapse: collapse; font-size: 14px; }}
+        th, td {{ text-align: left; padding: 6px 8px; border-bottom: 1px solid #333; vertical-align: top; }}
+        th {{ color: #AAA; position: sticky; top: 0; background: #0E1117; }}
+        .wrap {{ height: 300px; overflow-y: auto; }}
+    </style>
+    <div id="status">Connecting...</div>
+    <div class="wrap"><table><thead><tr><th>Client</th><th>Comment</th><th>Timestamp (UTC)</th></tr></thead><tbody id="rows"></tbody></table></div>
+    <script>
+        const rows = document.getElementById("rows");
+        const status = document.getElementById("status");
+        const source = new EventSource({json.dumps(stream_url)});
+        source.onopen = () => {{ status.textContent = "Live: new comments appear as they are posted."; }};
+        source.onerror = () => {{ status.textContent = "Reconnecting..."; }};
+        source.addEventListener("comment", (event) => {{
+            const c = JSON.parse(event.data);
+            const tr = document.createElement("tr");
+            for (const value of [c.client_name, c.comment, c.created_at]) {{
+                const td = document.createElement("td");
+                td.textContent = value;
+                tr.appendChild(td);
+            }}
+            rows.insertBefore(tr, rows.firstChild);
+            while (rows.children.length > {COMMENTS_VIEW_LIMIT}) rows.removeChild(rows.lastChild);
+        }});
+    </script>
+    """
 
 def app():
     # Load custom CSS for the dark theme and styling
-    load_css("app/style.css")
+    load_css()
     
     # --- Header with Kshitij Logo (Top Right) ---
     col_title, col_logo = st.columns([4, 1])
@@ -16,15 +118,70 @@ def app():
         st.title("Admin Panel 🛠️")
     with col_logo:
         # Kshitij logo display in the top right corner
-        if st.session_state.get('kshitij_logo_base64'):
+        if st.session_state.get('kshitij_logo_ref'):
             # If logo is uploaded, display it
-            st.image(st.session_state['kshitij_logo_base64'], width=80)
+            st.image(image_bytes(st.session_state['kshitij_logo_ref'], 160), width=80)
         else:
             # Otherwise, display the SVG fallback
-            st.markdown(kshitij_logo_svg(size='80'), unsafe_allow_html=True)
+            st.markdown(icon_html("kshitij_logo", 80, "vertical-align: middle; margin-left: 8px;"), unsafe_allow_html=True)
             
     st.markdown("---")
 
+    # --- Portfolio Overview (one read of the maintained project_summaries table) ---
+    st.subheader("Portfolio Overview")
+    summaries = list_project_summaries()
+    if summaries:
+        overview = pd.DataFrame(summaries).rename(columns={
+            "project_code": "Code", "project_name": "Project", "project_progress": "Progress",
+            "pending_rfi": "Pending RFI", "days_spent": "Days Spent", "comment_count": "Comments",
+            "last_comment_at": "Last Comment (UTC)", "updated_at": "Last Update (UTC)",
+        })
+        st.dataframe(
+            overview[["Code", "Project", "Progress", "Pending RFI", "Days Spent", "Comments", "Last Comment (UTC)", "Last Update (UTC)"]],
+            width="stretch",
+            hide_index=True,
+            column_config={"Progress": st.column_config.ProgressColumn(min_value=0, max_value=100, format="%d%%")},
+        )
+    else:
+        st.info("No projects yet.")
+
+    # --- Client Feedback Activity (read from the comment rollup tables, never the comments) ---
+    st.subheader("Client Feedback Activity")
+    activity_project = st.selectbox(
+        "Project", ["All projects"] + [s["project_code"] for s in summaries], key="activity_project"
+    )
+    activity_code = None if activity_project == "All projects" else activity_project
+    since = date.today() - timedelta(weeks=ACTIVITY_WEEKS)
+    weekly = list_weekly_comment_counts(activity_code, since=since - timedelta(days=since.weekday()))
+    a1, a2 = st.columns([3, 2])
+    with a1:
+        st.markdown(f"##### Comments per Week (last {ACTIVITY_WEEKS} weeks)")
+        if weekly:
+            by_week = pd.DataFrame(weekly).pivot_table(
+                index="week_start", columns="project_code", values="comment_count", aggfunc="sum", fill_value=0
+            )
+            by_week.index = pd.to_datetime(by_week.index)
+            st.bar_chart(by_week, height=280)
+        else:
+            st.info("No comments in this period.")
+    with a2:
+        st.markdown("##### Most Active Reviewers")
+        reviewers = list_top_reviewers(activity_code, TOP_REVIEWERS)
+        if reviewers:
+            st.dataframe(
+                pd.DataFrame(reviewers).rename(columns={
+                    "client_name": "Client", "comment_count": "Comments", "project_count": "Projects",
+                    "first_comment_at": "First (UTC)", "last_comment_at": "Latest (UTC)",
+                }),
+                width="stretch",
+                hide_index=True,
+                column_config={"Projects": None if activity_code else st.column_config.NumberColumn()},
+            )
+        else:
+            st.info("No comments yet.")
+
+    st.markdown("---")
+
     # --- Global Logo Uploads (Store in Session State for persistence across forms) ---
     st.subheader("Global Asset Management")
     col_logo_client, col_logo_kshitij = st.columns(2)
@@ -33,21 +190,21 @@ def app():
         st.caption("Upload Client Logo (Used in Client View)")
         uploaded_client_logo = st.file_uploader("Client Logo", type=['png', 'jpg', 'jpeg'], key="client_logo_uploader")
         if uploaded_client_logo:
-            st.session_state['client_logo_base64'] = get_base64_image_data(uploaded_client_logo)
-            st.image(st.session_state['client_logo_base64'], width=50, caption="Client Logo Preview")
-        elif 'client_logo_base64' not in st.session_state:
+            st.session_state['client_logo_ref'] = store_uploaded_image(uploaded_client_logo)
+            st.image(image_bytes(st.session_state['client_logo_ref'], 100), width=50, caption="Client Logo Preview")
+        elif 'client_logo_ref' not in st.session_state:
              # Initialize state key if not present and no file uploaded
-             st.session_state['client_logo_base64'] = None
+             st.session_state['client_logo_ref'] = None
 
     with col_logo_kshitij:
         st.caption("Upload Kshitij Logo (Used in Client View)")
         uploaded_kshitij_logo = st.file_uploader("Kshitij Logo", type=['png', 'jpg', 'jpeg'], key="kshitij_logo_uploader")
         if uploaded_kshitij_logo:
-            st.session_state['kshitij_logo_base64'] = get_base64_image_data(uploaded_kshitij_logo)
-            st.image(st.session_state['kshitij_logo_base64'], width=50, caption="Kshitij Logo Preview")
-        elif 'kshitij_logo_base64' not in st.session_state:
+            st.session_state['kshitij_logo_ref'] = store_uploaded_image(uploaded_kshitij_logo)
+            st.image(image_bytes(st.session_state['kshitij_logo_ref'], 100), width=50, caption="Kshitij Logo Preview")
+        elif 'kshitij_logo_ref' not in st.session_state:
              # Initialize state key if not present and no file uploaded
-             st.session_state['kshitij_logo_base64'] = None
+             st.session_state['kshitij_logo_ref'] = None
 
     st.markdown("---")
     
@@ -66,25 +223,37 @@ def app():
         else:
             selected_code = st.selectbox("Select Project Code to Edit", existing_codes)
             if selected_code:
-                p_obj = get_project_by_code(selected_code)
+                p_obj = get_project(selected_code)
                 if p_obj:
                     project_data = p_obj
                 
                 # Load existing logos/carousel from DB into session state if not already set by global uploaders
                 # This ensures the form shows the current state from the DB
-                if project_data.get('client_logo_base64') and 'client_logo_base64' not in st.session_state:
-                    st.session_state['client_logo_base64'] = project_data['client_logo_base64']
-                if project_data.get('kshitij_logo_base64') and 'kshitij_logo_base64' not in st.session_state:
-                    st.session_state['kshitij_logo_base64'] = project_data['kshitij_logo_base64']
+                if project_data.get('client_logo_ref') and not st.session_state.get('client_logo_ref'):
+                    st.session_state['client_logo_ref'] = project_data['client_logo_ref']
+                if project_data.get('kshitij_logo_ref') and not st.session_state.get('kshitij_logo_ref'):
+                    st.session_state['kshitij_logo_ref'] = project_data['kshitij_logo_ref']
                     
-                if project_data.get('carousel_images_json'):
-                    st.session_state['current_carousel_images'] = project_data['carousel_images_json']
-                else:
-                    st.session_state['current_carousel_images'] = []
+                # Reload the carousel only when another project or a newer version is selected, so
+                # removals made with the buttons below survive reruns until the form is submitted
+                loaded = (selected_code, project_data.get('version'))
+                if st.session_state.get('carousel_loaded_for') != loaded:
+                    st.session_state['carousel_loaded_for'] = loaded
+                    st.session_state['current_carousel_images'] = list(project_data.get('carousel_image_refs') or [])
             
     # Initialize carousel state for new projects
     if mode == "Create New Project" and 'current_carousel_images' not in st.session_state:
         st.session_state['current_carousel_images'] = []
+
+    # The version the admin saw when the form was last rendered; a submit compares against it, so a
+    # save by someone else in between is reported instead of silently overwritten. 0 = must not exist.
+    form_key = (mode, selected_code)
+    if st.session_state.get('form_base_key') == form_key:
+        base_version = st.session_state.get('form_base_version')
+    else:
+        base_version = project_data.get('version', 0)
+    st.session_state['form_base_key'] = form_key
+    st.session_state['form_base_version'] = project_data.get('version', 0)
     
     # --- Project Form ---
     with st.form("project_form"):
@@ -118,12 +287,18 @@ def app():
         uploaded_carousel_files = st.file_uploader("Add Images to Carousel", type=['png', 'jpg', 'jpeg'], accept_multiple_files=True, key="carousel_uploader")
 
         if uploaded_carousel_files:
-            # Process new uploads and add to session state
+            # Process new uploads and add their blob references to session state
+            known_refs = set(st.session_state['current_carousel_images'])
+            new_files = []
             for file in uploaded_carousel_files:
-                base64_data = get_base64_image_data(file)
-                # Check if image is already added to prevent duplicates
-                if base64_data and base64_data not in st.session_state['current_carousel_images']:
-                    st.session_state['current_carousel_images'].append(base64_data)
+                # Hash lookup prevents duplicates without comparing image payloads
+                ref = uploaded_file_ref(file)
+                if ref not in known_refs:
+                    known_refs.add(ref)
+                    new_files.append(file)
+            if new_files:
+                with st.spinner(f"Processing {len(new_files)} images..."):
+                    st.session_state['current_carousel_images'].extend(store_uploaded_images(new_files))
             st.success(f"Added {len(uploaded_carousel_files)} images.")
 
         # Display current carousel images and allow removal
@@ -154,15 +329,29 @@ def app():
                     "current_progress": curr_prog,
                     "next_week_plan": next_plan,
                     # Logos and Carousel are pulled from session state
-                    "client_logo_base64": st.session_state.get('client_logo_base64'),
-                    "kshitij_logo_base64": st.session_state.get('kshitij_logo_base64'),
-                    "carousel_images_json": st.session_state.get('current_carousel_images', [])
+                    "client_logo_ref": st.session_state.get('client_logo_ref'),
+                    "kshitij_logo_ref": st.session_state.get('kshitij_logo_ref'),
+                    "carousel_image_refs": st.session_state.get('current_carousel_images', [])
                 }
                 
-                upsert_project(data)
-                st.success(f"Project '{p_name}' saved successfully with code: {p_code}!")
-                time.sleep(1)
-                st.rerun()
+                # Renaming a code in edit mode saves a new project, which must not exist yet
+                expected = base_version if p_code == selected_code else 0
+                try:
+                    result = upsert_project(data, expected_version=expected)
+                except ProjectVersionConflict as e:
+                    st.error(f"{e} Your changes were not saved.")
+                    if e.current:
+                        differing = [k for k, v in data.items() if k in e.current and e.current[k] != v and (e.current[k] or v)]
+                        if differing:
+                            st.caption("Stored values differ from yours in: " + ", ".join(differing))
+                        st.caption("The form now shows the latest saved data. Re-apply your edits and submit again.")
+                else:
+                    if result["status"] == "unchanged":
+                        st.info("No changes to save.")
+                    else:
+                        st.success(f"Project '{p_name}' saved successfully with code: {p_code}!")
+                        time.sleep(1)
+                        st.rerun()
     
     # --- Carousel Removal Section (Moved Outside the Form) ---
     # Display current carousel images and allow removal
@@ -174,9 +363,9 @@ def app():
         # Create a temporary copy to iterate over
         carousel_copy = st.session_state['current_carousel_images'][:] 
         
-        for i, img_data in enumerate(carousel_copy):
+        for i, img_ref in enumerate(carousel_copy):
             with cols[i % 4]:
-                st.image(img_data, use_column_width=True)
+                st.image(image_bytes(img_ref, 256), width="stretch")
                 # Button to remove the image (NOW OUTSIDE THE FORM)
                 if st.button(f"Remove {i+1}", key=f"remove_img_{i}"):
                     try:
@@ -186,6 +375,35 @@ def app():
                     except IndexError:
                         pass # Should not happen with correct indexing
 
+    # --- Performance Panel (enabled with WPU_PERF=1) ---
+    if perf.PERF_ENABLED:
+        st.markdown("---")
+        st.subheader("Performance")
+        st.caption("Rolling render time and payload per client dashboard section, across all sessions on this server.")
+        perf_rows = perf.summary()
+        if perf_rows:
+            st.dataframe(pd.DataFrame(perf_rows), width="stretch", hide_index=True)
+        else:
+            st.info("No client dashboard renders recorded yet.")
+
+    # --- Session Memory ---
+    st.markdown("---")
+    st.subheader("Session Memory")
+    session_rows = sessions.usage()
+    total_kb = sum(r["State KB"] + r["Uploads KB"] + r["Pending Uploads KB"] for r in session_rows)
+    rss = sessions.process_rss_bytes()
+    m1, m2, m3 = st.columns(3)
+    m1.metric("Sessions", len(session_rows))
+    m2.metric("Held by Sessions", f"{total_kb / 1024:.1f} MB")
+    m3.metric("Process RSS", f"{rss / 1024 / 1024:.0f} MB" if rss else "n/a")
+    st.caption(
+        f"Budget {sessions.SESSION_BUDGET_BYTES / 1024 / 1024:.1f} MB per session; cached comment tables and raw "
+        f"uploads already stored as images are released over budget or after {sessions.IDLE_EVICT_SECONDS}s idle. "
+        "Pending uploads (selected but not yet processed) are kept and not counted against the budget."
+    )
+    if session_rows:
+        st.dataframe(pd.DataFrame(session_rows), width="stretch", hide_index=True)
+
     st.markdown("---")
     # --- Live Comments View ---
     if selected_code:
@@ -193,14 +411,71 @@ def app():
         st.subheader(f"Live Comments for: {selected_code}")
         
         st.caption("New comments from clients will appear here automatically.")
-        # Automatic refresh for live updates
-        if st.toggle("Enable Live Refresh (10s interval)", value=True):
-            time.sleep(10)
-            st.rerun()
-
-        comments = list_comments(selected_code)
-        if comments:
-            df = pd.DataFrame(comments)
-            st.dataframe(df, use_container_width=True, height=300) 
+        if push.push_enabled():
+            # Pushed by the comment service; no per-tab database polling
+            components.html(live_comments_html(selected_code), height=340)
+        else:
+            # Automatic refresh re-runs only the comments fragment, not the whole admin page
+            live = st.toggle("Enable Live Refresh (10s interval)", value=True)
+            st.fragment(run_every=LIVE_REFRESH_SECONDS if live else None)(comments_panel)(selected_code)
+
+    st.markdown("---")
+    # --- Comment Search (all projects) ---
+    st.subheader("Search Comments")
+    s1, s2, s3 = st.columns([3, 1, 1])
+    search_text = s1.text_input("Search text", key="comment_search_text")
+    search_project = s2.selectbox("Project", ["All projects"] + existing_codes, key="comment_search_project")
+    search_client = s3.text_input("Client (exact name)", key="comment_search_client")
+    if search_text.strip():
+        page = st.number_input("Page", min_value=1, value=1, step=1, key="comment_search_page")
+        found = search_comments(
+            search_text,
+            project_code=None if search_project == "All projects" else search_project,
+            client_name=search_client.strip() or None,
+            page=page,
+            page_size=SEARCH_PAGE_SIZE,
+        )
+        if found["results"]:
+            st.dataframe(pd.DataFrame(found["results"]), width="stretch", hide_index=True, column_config={"id": None})
+            if found["has_more"]:
+                st.caption("More results on the next page.")
         else:
-            st.info("No comments yet for this project.")
+            st.info("No matching comments.")
+
+    st.markdown("---")
+    # --- Export (built in memory when the button is clicked, up to EXPORT_MAX_BYTES) ---
+    st.subheader("Export Data")
+    e1, e2, e3 = st.columns(3)
+    export_kind = e1.radio("Data", ["comments", "projects"], format_func=str.title, horizontal=True, key="export_kind")
+    export_format = e2.selectbox("Format", list(EXPORT_FORMATS), key="export_format")
+    export_project = e3.selectbox("Project", ["All projects"] + existing_codes, key="export_project")
+    export_filters = {"project_code": None if export_project == "All projects" else export_project}
+    if export_kind == "comments":
+        date_range = st.date_input("Comment date range (optional)", value=(), key="export_dates")
+        if len(date_range) == 2:
+            export_filters.update(since=date_range[0], until=date_range[1])
+    st.download_button(
+        f"Download {export_kind} ({export_format.upper()})",
+        data=lambda: export_bytes(export_kind, export_format, **export_filters),
+        file_name=f"{export_kind}.{export_format}",
+        mime=EXPORT_FORMATS[export_format],
+        key="export_download",
+    )
+    st.caption(f"Downloads are limited to {EXPORT_MAX_BYTES // (1024 * 1024)} MB. For larger exports use python -m app.export, which streams to a file.")
+
+    # --- Bulk Import ---
+    st.markdown("---")
+    st.subheader("Bulk Import Projects")
+    st.caption("Columns: " + ", ".join(BULK_PROJECT_FIELDS) + ". project_code and project_name are required; blank cells keep the stored value. Images are not imported.")
+    import_file = st.file_uploader("Upload CSV, XLSX or JSON", type=["csv", "xlsx", "json"], key="bulk_import_file")
+    if import_file is not None and st.button("Apply Import", key="bulk_import_apply"):
+        try:
+            counts, errors = import_projects(import_file.getvalue(), import_file.name)
+        except (ValueError, ImportError) as e:
+            st.error(f"Could not read {import_file.name}: {e}")
+        else:
+            if errors:
+                st.error(f"Nothing was imported: {len(errors)} invalid row(s).")
+                st.dataframe(pd.DataFrame({"Error": errors}), width="stretch", hide_index=True)
+            else:
+                st.success(f"Import applied: {counts['created']} created, {counts['updated']} updated, {counts['unchanged']} unchanged.")
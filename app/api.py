@@ -0,0 +1,185 @@
+"""
+Read-only JSON API over the project database, for site dashboards and the mobile wrapper.
+It serves the same data as the client dashboard without a Streamlit session.
+
+    uvicorn app.api:app --port 8600      (or: python -m app.api --port 8600)
+
+Every request authenticates with the project code, as the client login does:
+    Authorization: Bearer <project code>
+
+    GET /api/project                       metrics, narrative and image URLs
+    GET /api/project/comments?before_id=&after_id=&limit=
+    GET /api/images/{image_ref}?width=N    image bytes (smallest variant at least N px wide; without
+                                           width, the size the client dashboard shows it at)
+
+Responses carry strong ETags (the project's version, the newest comment id, the blob's SHA-256).
+A matching If-None-Match gets a 304 after a single indexed lookup, without reading the project row,
+the comments or the image data.
+"""
+import argparse
+import hashlib
+from contextlib import asynccontextmanager
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+from app import db
+from app.cache import get_project
+
+COMMENTS_MAX_PAGE = 200
+# Default image widths, as the client dashboard renders them (app/render.py)
+LOGO_WIDTH = 200
+CAROUSEL_WIDTH = 500
+PROJECT_FIELDS = [
+    "project_code", "project_name", "title", "project_progress", "pending_rfi", "days_spent",
+    "model_review_link", "rfi_sheet_link", "alert_note", "current_progress", "next_week_plan", "updated_at",
+]
+
+
+def _etag(*parts):
+    return '"' + hashlib.sha256("|".join(str(p) for p in parts).encode("utf-8")).hexdigest()[:32] + '"'
+
+
+def _not_modified(request, etag):
+    return etag in [tag.strip() for tag in request.headers.get("if-none-match", "").split(",")]
+
+
+def _project_code(request):
+    scheme, _, code = request.headers.get("authorization", "").partition(" ")
+    return code.strip() if scheme.lower() == "bearer" else ""
+
+
+def _error(status, message):
+    return JSONResponse({"error": message}, status_code=status)
+
+
+def _int_param(request, name, default=None, low=None, high=None):
+    value = request.query_params.get(name)
+    if value in (None, ""):
+        return default
+    value = int(value) # ValueError is turned into a 400 by the caller
+    if low is not None:
+        value = max(low, value)
+    if high is not None:
+        value = min(high, value)
+    return value
+
+
+def _image_url(request, ref, width):
+    return str(request.url_for("image", image_ref=ref).include_query_params(width=width)) if ref else None
+
+
+async def project(request):
+    code = _project_code(request)
+    # updated_at alone authenticates the code and versions the response
+    version = await run_in_threadpool(db.get_project_version, code) if code else None
+    if version is None:
+        return _error(401, "Unknown project code.")
+    etag = _etag("project", code, version)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if _not_modified(request, etag):
+        return Response(status_code=304, headers=headers)
+
+    data = await run_in_threadpool(get_project, code)
+    if data is None:
+        return _error(401, "Unknown project code.")
+    body = {field: data.get(field) for field in PROJECT_FIELDS}
+    body["client_logo_url"] = _image_url(request, data.get("client_logo_ref"), LOGO_WIDTH)
+    body["kshitij_logo_url"] = _image_url(request, data.get("kshitij_logo_ref"), LOGO_WIDTH)
+    body["carousel_image_urls"] = [_image_url(request, ref, CAROUSEL_WIDTH) for ref in data.get("carousel_image_refs") or []]
+    return JSONResponse(body, headers={**headers, "ETag": _etag("project", code, data["updated_at"])})
+
+
+async def comments(request):
+    code = _project_code(request)
+    if not code or await run_in_threadpool(db.get_project_version, code) is None:
+        return _error(401, "Unknown project code.")
+    try:
+        before_id = _int_param(request, "before_id")
+        after_id = _int_param(request, "after_id")
+        limit = _int_param(request, "limit", 50, 1, COMMENTS_MAX_PAGE)
+    except ValueError:
+        return _error(400, "before_id, after_id and limit must be integers.")
+
+    # New comments only ever get larger ids, so the newest id versions every page of the list
+    latest_id = await run_in_threadpool(db.get_latest_comment_id, code)
+    etag = _etag("comments", code, latest_id, before_id, after_id, limit)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if _not_modified(request, etag):
+        return Response(status_code=304, headers=headers)
+
+    rows = await run_in_threadpool(db.list_comments, code, before_id, after_id, limit)
+    items = [{"id": r["id"], "client_name": r["Client"], "comment": r["Comment"], "created_at": r["Timestamp (UTC)"]} for r in rows]
+    return JSONResponse({
+        "comments": items,
+        "latest_id": latest_id,
+        "next_before_id": items[-1]["id"] if len(items) == limit else None,
+    }, headers=headers)
+
+
+def _resolve_image(code, image_ref, width):
+    """
+    Returns the blob reference to serve, or None if the image isn't part of this project. Uploads
+    are stored only as resized variants, so a request without a width gets the dashboard's size.
+    """
+    data = get_project(code)
+    if data is None:
+        return None
+    if image_ref in (data.get("client_logo_ref"), data.get("kshitij_logo_ref")):
+        default_width = LOGO_WIDTH
+    elif image_ref in (data.get("carousel_image_refs") or []):
+        default_width = CAROUSEL_WIDTH
+    else:
+        return None
+    return db.get_image_variant_ref(image_ref, width or default_width)
+
+
+async def image(request):
+    code = _project_code(request)
+    if not code:
+        return _error(401, "Unknown project code.")
+    try:
+        width = _int_param(request, "width", None, 1)
+    except ValueError:
+        return _error(400, "width must be an integer.")
+    sha = await run_in_threadpool(_resolve_image, code, request.path_params["image_ref"], width)
+    if sha is None:
+        return _error(404, "Image not found.")
+    # Blobs are content-addressed, so the reference is the ETag and the bytes never change
+    etag = f'"{sha}"'
+    headers = {"ETag": etag, "Cache-Control": "private, max-age=31536000, immutable"}
+    if _not_modified(request, etag):
+        return Response(status_code=304, headers=headers)
+    blob = await run_in_threadpool(db.get_blob, sha)
+    if blob is None:
+        return _error(404, "Image not found.")
+    return Response(blob["data"], media_type=blob["mime_type"], headers=headers)
+
+
+@asynccontextmanager
+async def lifespan(_app):
+    db.init_db()
+    yield
+
+
+app = Starlette(
+    routes=[
+        Route("/api/project", project),
+        Route("/api/project/comments", comments),
+        Route("/api/images/{image_ref}", image, name="image"),
+    ],
+    lifespan=lifespan,
+)
+
+
+def main(argv=None):
+    import uvicorn
+    parser = argparse.ArgumentParser(description="Read-only JSON API for project dashboards.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8600)
+    args = parser.parse_args(argv)
+    uvicorn.run(app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+import os
+import re
+import hashlib
+import functools
+import streamlit as st
+from app.db import get_blob, get_image_variant_ref
+from app.utils import load_css as load_inline_css, roadmap_svg, kshitij_logo_svg
+
+# Static asset pipeline: CSS, font and icons are minified, content-hashed and written once per
+# process to ./static/assets, which Streamlit serves at app/static/assets/ when
+# server.enableStaticServing is on (.streamlit/config.toml). Pages then reference them by URL,
+# so the browser downloads each file once instead of receiving it inline on every rerun.
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_DIR = os.path.join(BASE_DIR, "app")
+STATIC_ASSETS_DIR = os.path.join(BASE_DIR, "static", "assets")
+STATIC_ASSETS_URL = "app/static/assets"
+# Project images can be written next to them under their blob SHA-256, on first use. Off by default:
+# Streamlit serves static files to anyone with the URL, without the app's login.
+STATIC_IMAGES = os.environ.get("WPU_STATIC_IMAGES", "0").lower() in ("1", "true", "yes")
+STATIC_IMAGES_DIR = os.path.join(BASE_DIR, "static", "images")
+STATIC_IMAGES_URL = "app/static/images"
+IMAGE_EXTENSIONS = {"image/jpeg": "jpg", "image/png": "png", "image/webp": "webp", "image/gif": "gif"}
+
+CSS_SOURCE = os.path.join(APP_DIR, "style.css")
+FONT_SOURCE = os.path.join(APP_DIR, "assets", "fonts", "AvantGarde.woff2")
+FONT_SOURCE_URL = "app/assets/fonts/AvantGarde.woff2" # As referenced in style.css
+
+ICONS = {
+    "roadmap": roadmap_svg,
+    "kshitij_logo": kshitij_logo_svg,
+}
+
+
+def minify_css(css):
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    css = re.sub(r"\s+", " ", css)
+    css = re.sub(r"\s*([{};,>])\s*", r"\1", css)
+    # Only trim after colons: a space before one is significant in selectors like "div :hover"
+    css = re.sub(r":\s+", ":", css)
+    return css.replace(";}", "}").strip()
+
+
+def _write_hashed(name, ext, data: bytes):
+    """Writes data as <name>.<hash>.<ext> (if not already there) and returns its URL."""
+    digest = hashlib.sha256(data).hexdigest()[:12]
+    filename = f"{name}.{digest}.{ext}"
+    path = os.path.join(STATIC_ASSETS_DIR, filename)
+    if not os.path.exists(path):
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    return f"{STATIC_ASSETS_URL}/{filename}"
+
+
+@functools.lru_cache(maxsize=None)
+def static_manifest():
+    """
+    Builds the hashed static files once per process and returns {asset name: URL}.
+    Returns None when static serving is off or the directory isn't writable; callers then inline.
+    """
+    if not st.get_option("server.enableStaticServing"):
+        return None
+    try:
+        os.makedirs(STATIC_ASSETS_DIR, exist_ok=True)
+        manifest = {}
+        css = minify_css(open(CSS_SOURCE, encoding="utf-8").read())
+        if os.path.exists(FONT_SOURCE):
+            with open(FONT_SOURCE, "rb") as f:
+                font_url = _write_hashed("AvantGarde", "woff2", f.read())
+            # The stylesheet is served from the same directory as the font
+            css = css.replace(FONT_SOURCE_URL, font_url.rsplit("/", 1)[1])
+            manifest["font"] = font_url
+        manifest["css"] = _write_hashed("style", "css", css.encode("utf-8"))
+        for name, svg in ICONS.items():
+            manifest[name] = _write_hashed(name, "svg", minify_svg(svg(size="100")).encode("utf-8"))
+        return manifest
+    except OSError as e:
+        print(f"Static assets unavailable ({e}). Falling back to inline assets.")
+        return None
+
+
+_image_files = {} # blob sha256 -> URL of the file already written for it
+
+
+def image_file_url(ref, min_width):
+    """
+    URL of a static file holding the smallest variant of an image that fits min_width, so the
+    browser fetches it over HTTP (and can lazy-load and cache it) instead of receiving a data URL
+    over the websocket. Files are named by content hash and never change. Returns None unless
+    WPU_STATIC_IMAGES and static serving are on, or when the file can't be written; callers then
+    inline a data URL.
+    """
+    if not ref or not STATIC_IMAGES or not static_manifest():
+        return None
+    sha = get_image_variant_ref(ref, min_width)
+    url = _image_files.get(sha)
+    if url is None:
+        blob = get_blob(sha)
+        if blob is None:
+            return None
+        filename = f"{sha}.{IMAGE_EXTENSIONS.get(blob['mime_type'], 'bin')}"
+        path = os.path.join(STATIC_IMAGES_DIR, filename)
+        try:
+            if not os.path.exists(path):
+                os.makedirs(STATIC_IMAGES_DIR, exist_ok=True)
+                tmp_path = f"{path}.{os.getpid()}.tmp"
+                with open(tmp_path, "wb") as f:
+                    f.write(blob["data"])
+                os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Static image unavailable ({e}). Falling back to a data URL.")
+            return None
+        url = _image_files[sha] = f"{STATIC_IMAGES_URL}/{filename}"
+    return url
+
+
+def minify_svg(svg):
+    svg = re.sub(r">\s+<", "><", svg.strip())
+    # A standalone SVG file needs its namespace; inline SVG in HTML does not
+    return svg.replace("<svg ", '<svg xmlns="http://www.w3.org/2000/svg" ', 1)
+
+
+def load_css():
+    """References the hashed stylesheet (a few bytes per rerun), or inlines it as before."""
+    manifest = static_manifest()
+    if manifest:
+        st.markdown(f'<style>@import url("{manifest["css"]}");</style>', unsafe_allow_html=True)
+    else:
+        load_inline_css(CSS_SOURCE)
+
+
+def icon_html(name, size, style=""):
+    """An <img> pointing at the static icon, or the inline SVG when static serving is off."""
+    manifest = static_manifest()
+    if manifest and name in manifest:
+        return f'<img src="{manifest[name]}" width="{size}" height="{size}" alt="" style="{style}"/>'
+    return ICONS[name](size=str(size))
@@ -0,0 +1,90 @@
+import io
+import csv
+import json
+import pandas as pd
+from app.db import BULK_PROJECT_FIELDS, bulk_upsert_projects
+
+# Bulk project import: parse a CSV/XLSX/JSON file, validate every row, then apply all of them
+# through db.bulk_upsert_projects in a single transaction.
+REQUIRED_FIELDS = ["project_code", "project_name"]
+INT_FIELDS = {"project_progress": (0, 100), "pending_rfi": (0, None), "days_spent": (0, None)}
+
+
+def load_rows(file_bytes: bytes, filename: str):
+    """Returns a list of dicts from a .csv, .xlsx or .json file (a list of objects, or {"projects": [...]})."""
+    name = filename.lower()
+    if name.endswith(".csv"):
+        return list(csv.DictReader(io.StringIO(file_bytes.decode("utf-8-sig"))))
+    if name.endswith(".xlsx"):
+        try:
+            import openpyxl # noqa: F401
+        except ImportError:
+            raise ImportError("XLSX import requires openpyxl (pip install openpyxl).")
+        # Everything is read as text and validated below
+        return pd.read_excel(io.BytesIO(file_bytes), dtype=str, engine="openpyxl").fillna("").to_dict("records")
+    if name.endswith(".json"):
+        data = json.loads(file_bytes.decode("utf-8"))
+        if isinstance(data, dict):
+            data = data.get("projects", [])
+        if not isinstance(data, list) or not all(isinstance(row, dict) for row in data):
+            raise ValueError("JSON must be a list of project objects or {\"projects\": [...]}.")
+        return data
+    raise ValueError("Unsupported file type. Upload a .csv, .xlsx or .json file.")
+
+
+def _blank(value):
+    return value is None or (isinstance(value, str) and not value.strip())
+
+
+def validate_rows(raw_rows):
+    """
+    Checks every row before anything is written.
+    Returns (rows, errors): cleaned rows limited to known fields, and a list of error strings.
+    Blank cells are left out of the row, so they don't overwrite stored values.
+    """
+    rows, errors, seen = [], [], set()
+    for line, raw in enumerate(raw_rows, start=1):
+        row = {}
+        for key, value in raw.items():
+            key = str(key).strip()
+            if key in BULK_PROJECT_FIELDS and not _blank(value):
+                row[key] = value.strip() if isinstance(value, str) else value
+
+        missing = [f for f in REQUIRED_FIELDS if f not in row]
+        if missing:
+            errors.append(f"Row {line}: missing {', '.join(missing)}.")
+            continue
+        row["project_code"] = str(row["project_code"])
+        if row["project_code"] in seen:
+            errors.append(f"Row {line}: duplicate project_code '{row['project_code']}'.")
+            continue
+        seen.add(row["project_code"])
+
+        for field, (low, high) in INT_FIELDS.items():
+            if field not in row:
+                continue
+            try:
+                value = int(float(row[field]))
+            except (TypeError, ValueError, OverflowError): # "inf" and "1e400" overflow int()
+                errors.append(f"Row {line}: {field} must be a number, got '{row[field]}'.")
+                continue
+            if value < low or (high is not None and value > high):
+                errors.append(f"Row {line}: {field} must be between {low} and {high if high is not None else 'any'}, got {value}.")
+                continue
+            row[field] = value
+        for field in BULK_PROJECT_FIELDS:
+            if field in row and field not in INT_FIELDS:
+                row[field] = str(row[field])
+        rows.append(row)
+    return rows, errors
+
+
+def import_projects(file_bytes: bytes, filename: str):
+    """
+    Parses, validates and applies a bulk import. Nothing is written if any row is invalid.
+    Returns (counts, errors); counts is None when validation failed.
+    """
+    rows, errors = validate_rows(load_rows(file_bytes, filename))
+    if errors:
+        return None, errors
+    return bulk_upsert_projects(rows), []
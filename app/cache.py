@@ -0,0 +1,119 @@
+import os
+import json
+import threading
+from datetime import datetime, timedelta
+from collections import OrderedDict
+from app.db import get_project_by_code, get_project_version, blob_data_url, list_project_snapshots
+
+# Process-wide caches shared by every Streamlit session. Sizes are in bytes.
+PROJECT_CACHE_MAX_BYTES = int(os.environ.get("WPU_PROJECT_CACHE_BYTES", 16 * 1024 * 1024))
+IMAGE_CACHE_MAX_BYTES = int(os.environ.get("WPU_IMAGE_CACHE_BYTES", 128 * 1024 * 1024))
+
+
+class LRUByteCache:
+    """Thread-safe LRU mapping bounded by the total byte size of its values."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict() # key -> (value, nbytes)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value, nbytes):
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            if nbytes > self.max_bytes:
+                return # Too large to cache at all
+            self._entries[key] = (value, nbytes)
+            self._bytes += nbytes
+            while self._bytes > self.max_bytes:
+                _, (_, evicted_bytes) = self._entries.popitem(last=False)
+                self._bytes -= evicted_bytes
+
+    def invalidate(self, key):
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+project_cache = LRUByteCache(PROJECT_CACHE_MAX_BYTES)
+image_cache = LRUByteCache(IMAGE_CACHE_MAX_BYTES)
+
+
+def get_project(project_code):
+    """
+    Read-through cached project lookup. Each call checks the row's updated_at (a single
+    indexed column read), so an admin save is visible on the next rerun of every session.
+    The returned dict is shared between sessions and must not be mutated.
+    """
+    if not project_code:
+        return None
+    version = get_project_version(project_code)
+    if version is None:
+        project_cache.invalidate(project_code)
+        return None
+    cached = project_cache.get(project_code)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    project = get_project_by_code(project_code)
+    if project is None:
+        project_cache.invalidate(project_code)
+        return None
+    project_cache.put(project_code, (project["updated_at"], project), len(json.dumps(project, default=str)))
+    return project
+
+
+def get_project_trend(project, days=365):
+    """
+    Metric snapshots (oldest first) for the client trend charts. Every save appends a snapshot and
+    bumps updated_at, so the list is cached per project version like the project itself.
+    """
+    key = ("trend", project["project_code"], project["updated_at"], days)
+    snapshots = project_cache.get(key)
+    if snapshots is None:
+        since = (datetime.utcnow() - timedelta(days=days)).isoformat()
+        snapshots = list_project_snapshots(project["project_code"], since=since)
+        project_cache.put(key, snapshots, len(json.dumps(snapshots)))
+    return snapshots
+
+
+def get_blob_data_url(sha256):
+    """Cached blob_data_url; blobs are content-addressed, so entries never go stale."""
+    if not sha256:
+        return None
+    data_url = image_cache.get(sha256)
+    if data_url is None:
+        data_url = blob_data_url(sha256)
+        if data_url is not None:
+            image_cache.put(sha256, data_url, len(data_url))
+    return data_url
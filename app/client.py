@@ -1,17 +1,53 @@
 import streamlit as st
 import time
 import json
-from app.db import get_project_by_code, add_comment
-# Assuming these utilities are available from app/utils.py (as provided in the previous step)
-from app.utils import load_css, create_circular_meter, roadmap_svg, kshitij_logo_svg
+from app.db import add_comment
+from app.comment_queue import CommentQueueFull, CommentWriteTimeout
+from app import perf
+from app.cache import get_project, get_project_trend
+from datetime import datetime
+from app.assets import load_css
+from app.render import section_html, carousel_page_html, carousel_pages
+
+# The narrative and carousel are fragments: separate units after the header, gauge and metrics,
+# and carousel paging reruns only the carousel.
+@st.fragment
+def narrative_section(project):
+    with perf.section("narrative", project["project_code"]):
+        narrative = section_html(project, "narrative")
+        st.markdown(narrative["current_progress_heading"], unsafe_allow_html=True)
+        st.info(project["current_progress"] or "No updates yet.")
+
+        st.markdown(narrative["next_week_plan_heading"], unsafe_allow_html=True)
+        st.info(project["next_week_plan"] or "No updates yet.")
+
+def _set_carousel_page(page):
+    st.session_state.carousel_page = page
+
+@st.fragment
+def carousel_section(project):
+    """One page of project visuals. Images are lazy-loaded files, so only visible cards are fetched."""
+    pages = carousel_pages(project)
+    if not pages:
+        return
+    with perf.section("carousel", project["project_code"]):
+        st.markdown("---")
+        st.subheader("Project Visuals")
+        page = min(st.session_state.get("carousel_page", 0), pages - 1)
+        st.markdown(carousel_page_html(project, page), unsafe_allow_html=True)
+        if pages > 1:
+            c1, c2, c3 = st.columns([1, 2, 1])
+            c1.button("◀ Previous", key="carousel_prev", disabled=page == 0, on_click=_set_carousel_page, args=(page - 1,))
+            c2.caption(f"Page {page + 1} of {pages}")
+            c3.button("Next ▶", key="carousel_next", disabled=page == pages - 1, on_click=_set_carousel_page, args=(page + 1,))
 
 def app():
-    load_css("app/style.css")
+    load_css()
 
     # --- Authentication State ---
     if "logged_in" not in st.session_state:
         st.session_state.logged_in = False
-        st.session_state.project_data = None
+        st.session_state.project_code = None
 
     # --- Login Screen ---
     if not st.session_state.logged_in:
@@ -25,12 +61,11 @@ def app():
 
             if submit_button:
                 if code_input and name_input:
-                    project_data = get_project_by_code(code_input)
-                    if project_data:
+                    if get_project(code_input):
                         st.session_state.logged_in = True
                         st.session_state.client_name = name_input
-                        st.session_state.project_code = code_input
-                        st.session_state.project_data = project_data # Store data
+                        st.session_state.project_code = code_input # Only the code; data comes from the shared cache
+                        st.session_state.carousel_page = 0
                         st.rerun()
                     else:
                         st.error("Invalid Project Code.")
@@ -39,159 +74,130 @@ def app():
         return
 
     # --- Dashboard ---
-    # Retrieve project data from session state (or refresh if needed, for simplicity we use state here)
-    project = st.session_state.project_data
-    if project is None:
-        project = get_project_by_code(st.session_state.project_code)
-        st.session_state.project_data = project # Update state
+    # Read through the process-wide cache, which revalidates against updated_at on every rerun
+    project = get_project(st.session_state.project_code)
 
     if not project:
         st.error("Project not found. The project code may have been updated or deleted.")
         if st.button("Back to Login"):
             st.session_state.logged_in = False
-            st.session_state.project_data = None
+            st.session_state.project_code = None
             st.rerun()
         return
 
     # --- Header and Logo (Centered Alignment) ---
-    col_client_logo, col_center_text, col_kshitij_logo = st.columns([1, 4, 1])
-
-    with col_client_logo:
-        # Client Logo (from Base64 in DB)
-        if project.get('client_logo_base64'):
-            # Use HTML to prevent Streamlit from wrapping the image in an undesired container size
-            st.markdown(f'<img src="{project["client_logo_base64"]}" style="width:100px; height:auto; display:block; margin: 0 auto;"/>', unsafe_allow_html=True)
-        else:
-            # Fallback placeholder
-            st.markdown(f'<div style="width:100px; height:100px; background:#111; border: 2px solid #333; border-radius:10px; display:flex; justify-content:center; align-items:center; font-size: 2em; margin: 0 auto;">🏢</div>', unsafe_allow_html=True)
-            
-    with col_center_text:
-        # Center aligned titles using markdown HTML
-        st.markdown(f'<h1 style="text-align:center; color:#FF0000; margin-bottom: 0px;">{project["project_name"]}</h1>', unsafe_allow_html=True)
-        st.markdown(f'<h2 style="text-align:center; color:#FFFFFF; margin-top: 0px;">{project["title"]}</h2>', unsafe_allow_html=True)
-
-    with col_kshitij_logo:
-        # Kshitij Logo (from Base64 in DB or SVG fallback)
-        if project.get('kshitij_logo_base64'):
-            st.markdown(f'<img src="{project["kshitij_logo_base64"]}" style="width:100px; height:auto; display:block; margin: 0 auto;"/>', unsafe_allow_html=True)
-        else:
-            st.markdown(kshitij_logo_svg(size='100'), unsafe_allow_html=True)
-
-    st.markdown("---")
+    # Section HTML is memoized per project version (app/render.py), so reruns only re-emit it
+    with perf.section("header", project["project_code"]):
+        header = section_html(project, "header")
+        col_client_logo, col_center_text, col_kshitij_logo = st.columns([1, 4, 1])
+
+        with col_client_logo:
+            # Client Logo (from the blob store, or a placeholder)
+            st.markdown(header["client_logo"], unsafe_allow_html=True)
+
+        with col_center_text:
+            # Center aligned titles using markdown HTML
+            st.markdown(header["project_name"], unsafe_allow_html=True)
+            st.markdown(header["title"], unsafe_allow_html=True)
+
+        with col_kshitij_logo:
+            # Kshitij Logo (from the blob store or SVG fallback)
+            st.markdown(header["kshitij_logo"], unsafe_allow_html=True)
+
+        st.markdown("---")
 
     # --- Metrics Row (Progress Gauge, Days Spent, RFI) ---
-    st.subheader("Project Health Summary")
-    
-    col_prog, col_metrics = st.columns([1.5, 1])
-
-    # 1. Overall Progress Gauge (Large and Center Aligned)
-    with col_prog:
-        meter_html = create_circular_meter(
-            label="Overall Progress", 
-            value=project["project_progress"], 
-            max_value=100, 
-            color="#00C853", # Bright Green
-            size="250px"
-        )
-        # Ensure the meter is visually centered within its column
-        st.markdown(f'<div style="display:flex; justify-content:center;">{meter_html}</div>', unsafe_allow_html=True)
-    
-    # 2. Days Spent & Pending RFI (Standard Metrics, grouped)
-    with col_metrics:
-        # Spacing to visually align with the center of the large gauge
-        st.markdown("<br><br><br><br>", unsafe_allow_html=True) 
-        st.metric("Days Spent", project["days_spent"])
-        st.metric("Pending RFI", project["pending_rfi"])
-
-    st.markdown("<br>", unsafe_allow_html=True) 
+    with perf.section("meters", project["project_code"]):
+        st.subheader("Project Health Summary")
+
+        col_prog, col_metrics = st.columns([1.5, 1])
+
+        # 1. Overall Progress Gauge (Large and Center Aligned)
+        with col_prog:
+            st.markdown(section_html(project, "meters")["progress"], unsafe_allow_html=True)
+
+        # 2. Days Spent & Pending RFI (Standard Metrics, grouped)
+        with col_metrics:
+            # Spacing to visually align with the center of the large gauge
+            st.markdown("<br><br><br><br>", unsafe_allow_html=True)
+            st.metric("Days Spent", project["days_spent"])
+            st.metric("Pending RFI", project["pending_rfi"])
+
+        st.markdown("<br>", unsafe_allow_html=True)
+
+    # --- Trends (from the weekly snapshot history) ---
+    with perf.section("trends", project["project_code"]):
+        snapshots = get_project_trend(project)
+        if len(snapshots) > 1:
+            st.subheader("Progress Over Time")
+            trend = {
+                "Date": [datetime.fromisoformat(s["captured_at"]) for s in snapshots],
+                "Progress (%)": [s["project_progress"] for s in snapshots],
+                "Pending RFI": [s["pending_rfi"] for s in snapshots],
+            }
+            t1, t2 = st.columns(2)
+            with t1:
+                st.line_chart(trend, x="Date", y="Progress (%)", color="#00C853", height=220)
+            with t2:
+                st.line_chart(trend, x="Date", y="Pending RFI", color="#FF0000", height=220)
+            st.markdown("<br>", unsafe_allow_html=True)
 
     # --- Action Buttons (Transparent Circular) ---
-    st.subheader("Key Interactions")
-    
-    # Check if links exist before creating columns
-    links_exist = project.get("model_review_link") or project.get("rfi_sheet_link")
-    if links_exist:
-        # Distribute buttons centrally
-        l1, l2, _ = st.columns([1, 1, 2]) 
-
-        with l1:
-            if project.get("model_review_link"):
-                st.markdown(f"""
-                <div class="transparent-circle-link">
-                    <a href="{project['model_review_link']}" target="_blank">
-                        <div class="icon">💻</div> 
-                        Review Model
-                    </a>
-                </div>
-                """, unsafe_allow_html=True)
-        with l2:
-            if project.get("rfi_sheet_link"):
-                st.markdown(f"""
-                <div class="transparent-circle-link">
-                    <a href="{project['rfi_sheet_link']}" target="_blank">
-                        <div class="icon">🔗</div> 
-                        RFI Sheet
-                    </a>
-                </div>
-                """, unsafe_allow_html=True)
-
-    # Alert Note (Emoji only, no red box)
-    if project.get("alert_note"):
-        st.markdown(f"""
-        <div class="alert-box">
-            🚨 {project["alert_note"]}
-        </div>
-        """, unsafe_allow_html=True)
+    with perf.section("links", project["project_code"]):
+        st.subheader("Key Interactions")
+        links = section_html(project, "links")
+
+        # Check if links exist before creating columns
+        if "model_review" in links or "rfi_sheet" in links:
+            # Distribute buttons centrally
+            l1, l2, _ = st.columns([1, 1, 2])
+
+            with l1:
+                if "model_review" in links:
+                    st.markdown(links["model_review"], unsafe_allow_html=True)
+            with l2:
+                if "rfi_sheet" in links:
+                    st.markdown(links["rfi_sheet"], unsafe_allow_html=True)
+
+        if "alert" in links:
+            st.markdown(links["alert"], unsafe_allow_html=True)
 
     # --- Narrative Content ---
-    st.markdown(f"<h4>{roadmap_svg(size='32')} Current Progress</h4>", unsafe_allow_html=True)
-    st.info(project["current_progress"] or "No updates yet.")
+    narrative_section(project)
 
-    st.markdown(f"<h4>{roadmap_svg(size='32')} Next Week Plan</h4>", unsafe_allow_html=True)
-    st.info(project["next_week_plan"] or "No updates yet.")
+    # --- Image Carousel (paged) ---
+    carousel_section(project)
 
-    # --- Image Carousel ---
-    carousel_images = project.get("carousel_images_json", [])
-    if carousel_images and len(carousel_images) > 0:
+    # --- Feedback ---
+    with perf.section("feedback", project["project_code"]):
         st.markdown("---")
-        st.subheader("Project Visuals")
-        
-        # Manually create the horizontal scrolling container using custom CSS
-        image_html = '<div class="image-carousel">'
-        for img_data in carousel_images:
-            image_html += f"""
-            <div class="carousel-image-wrapper">
-                <img src="{img_data}" alt="Project Visual"/>
-            </div>
-            """
-        image_html += '</div>'
-        st.markdown(image_html, unsafe_allow_html=True)
-
-
-    st.markdown("---")
-    st.write("Feedback and inputs are welcome. For any clarifications or additional details, feel free to reach out.")
-
-    # Interaction Section
-    with st.container(border=True):
-        st.subheader("Provide Feedback")
-        reviewed = st.checkbox("I have reviewed the model", key="reviewed_checkbox")
+        st.write("Feedback and inputs are welcome. For any clarifications or additional details, feel free to reach out.")
+
+        # Interaction Section
+        with st.container(border=True):
+            st.subheader("Provide Feedback")
+            reviewed = st.checkbox("I have reviewed the model", key="reviewed_checkbox")
         
-        # Disable/Enable logic
-        if reviewed:
-            comment_text = st.text_area("Your Comment (Optional)", key="user_comment")
-            if st.button("Submit Feedback", key="submit_comment_btn"):
-                if comment_text.strip():
-                    add_comment(
-                        project["project_code"],
-                        st.session_state.client_name,
-                        comment_text
-                    )
-                    st.success("Feedback submitted successfully!")
-                    # Clear the text area after submission
-                    st.session_state.user_comment = ""
-                    st.rerun() # Refresh to show clean state
-                else:
-                    st.warning("Please write a comment before submitting.")
-        else:
-            st.text_area("Your Comment", disabled=True, placeholder="Please check 'I have reviewed the model' first.")
-            st.button("Submit Feedback", disabled=True)
+            # Disable/Enable logic
+            if reviewed:
+                comment_text = st.text_area("Your Comment (Optional)", key="user_comment")
+                if st.button("Submit Feedback", key="submit_comment_btn"):
+                    if comment_text.strip():
+                        try:
+                            add_comment(
+                                project["project_code"],
+                                st.session_state.client_name,
+                                comment_text
+                            )
+                        except (CommentQueueFull, CommentWriteTimeout) as e:
+                            st.error(str(e))
+                            return
+                        st.success("Feedback submitted successfully!")
+                        # Clear the text area after submission (a created widget's value can't be reassigned, but dropping its key resets it)
+                        del st.session_state.user_comment
+                        st.rerun() # Refresh to show clean state
+                    else:
+                        st.warning("Please write a comment before submitting.")
+            else:
+                st.text_area("Your Comment", disabled=True, placeholder="Please check 'I have reviewed the model' first.")
+                st.button("Submit Feedback", disabled=True)
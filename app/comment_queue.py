@@ -0,0 +1,123 @@
+import os
+import queue
+import atexit
+import threading
+import time
+from concurrent.futures import Future
+from app.db import insert_comments
+
+# Write-behind settings for comment ingestion (enabled with WPU_COMMENT_WRITE_BEHIND=1)
+QUEUE_SIZE = int(os.environ.get("WPU_COMMENT_QUEUE_SIZE", 10000))
+BATCH_ROWS = int(os.environ.get("WPU_COMMENT_BATCH_ROWS", 200))
+BATCH_MS = int(os.environ.get("WPU_COMMENT_BATCH_MS", 0))
+# How long a submitter waits for queue space before giving up
+ENQUEUE_TIMEOUT = float(os.environ.get("WPU_COMMENT_ENQUEUE_TIMEOUT", 5))
+# How long a submitter waits for its batch to be committed before giving up
+COMMIT_TIMEOUT = float(os.environ.get("WPU_COMMENT_COMMIT_TIMEOUT", 30))
+
+
+class CommentQueueFull(Exception):
+    """Raised when the write-behind queue stays full for longer than the enqueue timeout."""
+
+
+class CommentWriteTimeout(Exception):
+    """Raised when a queued comment is not committed within the commit timeout."""
+
+
+class CommentWriter:
+    """
+    Bounded in-process queue drained by one background thread. Rows are committed in batches of
+    up to batch_rows (everything queued, plus whatever arrives within batch_ms) as one transaction.
+    Each submit returns a Future that resolves once its batch is committed. If a batch fails, its
+    rows are retried one by one so that only the failing rows' futures get the error.
+    """
+
+    def __init__(self, queue_size=QUEUE_SIZE, batch_rows=BATCH_ROWS, batch_ms=BATCH_MS, write_batch=insert_comments):
+        self.batch_rows = batch_rows
+        self.batch_seconds = batch_ms / 1000
+        self._write_batch = write_batch
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._stopping = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="comment-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, row, timeout=ENQUEUE_TIMEOUT):
+        """Queues a comment row. Blocks while the queue is full (back-pressure) for up to timeout seconds."""
+        if self._stopping.is_set():
+            raise RuntimeError("Comment writer is shut down.")
+        future = Future()
+        try:
+            self._queue.put((row, future), timeout=timeout)
+        except queue.Full:
+            raise CommentQueueFull("Too many comments are being submitted right now. Please try again.")
+        return future
+
+    def pending(self):
+        return self._queue.qsize()
+
+    def _next_batch(self):
+        try:
+            batch = [self._queue.get(timeout=0.5)]
+        except queue.Empty:
+            return []
+        # Group commit: take everything that queued up while the previous batch was being written,
+        # then optionally wait up to batch_ms for more before committing.
+        deadline = time.monotonic() + self.batch_seconds
+        while len(batch) < self.batch_rows:
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except queue.Empty:
+                pass
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while not (self._stopping.is_set() and self._queue.empty()):
+            batch = self._next_batch()
+            if not batch:
+                continue
+            try:
+                self._write_batch([row for row, _ in batch])
+            except Exception as exc:
+                if len(batch) == 1:
+                    batch[0][1].set_exception(exc)
+                else:
+                    self._write_rows(batch) # One bad row must not fail everyone else's comment
+            else:
+                for _, future in batch:
+                    future.set_result(None)
+
+    def _write_rows(self, batch):
+        for row, future in batch:
+            try:
+                self._write_batch([row])
+            except Exception as exc:
+                future.set_exception(exc)
+            else:
+                future.set_result(None)
+
+    def close(self, timeout=10):
+        """Stops accepting rows and waits for everything already queued to be committed."""
+        self._stopping.set()
+        self._thread.join(timeout)
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_comment_writer():
+    """Process-wide writer, started on first use and flushed at interpreter shutdown."""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = CommentWriter()
+            atexit.register(_writer.close)
+        return _writer
@@ -1,14 +1,23 @@
 import os
 import json
-from datetime import datetime
+import sqlite3
+import threading
+import base64
+import hashlib
+import zlib
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from contextlib import contextmanager
+from datetime import date, datetime
 import sqlalchemy as sa
 from sqlalchemy.orm import sessionmaker, declarative_base
 from sqlalchemy import create_engine, Column, Integer, String, Text, LargeBinary
 from sqlalchemy.types import TypeDecorator
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 
 # Custom type for handling JSON (for image list)
 class JSONEncodedDict(TypeDecorator):
     impl = Text
+    cache_ok = True # Stateless, so safe in SQLAlchemy statement cache keys
 
     def process_bind_param(self, value, dialect):
         if value is not None:
@@ -20,19 +29,107 @@ class JSONEncodedDict(TypeDecorator):
             return json.loads(value)
         return None
 
-# Setup DB Path
+# Setup DB Path (WPU_DB_PATH points the app at another database, e.g. a temp file for benchmarks)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DATA_DIR = os.path.join(BASE_DIR, 'data')
-DB_PATH = os.path.join(DATA_DIR, 'app.db')
+DB_PATH = os.environ.get("WPU_DB_PATH", os.path.join(DATA_DIR, 'app.db'))
 
 # Ensure data directory exists
-os.makedirs(DATA_DIR, exist_ok=True)
+os.makedirs(os.path.dirname(os.path.abspath(DB_PATH)), exist_ok=True)
 
 DATABASE_URL = f"sqlite:///{DB_PATH}"
 
+# --- Engine Configuration ---
+# SQLite tuning applied to every new connection; each value can be overridden by environment variable.
+# WAL lets readers run alongside the single writer, and busy_timeout makes writers queue for the
+# lock instead of failing with "database is locked". An empty value skips that pragma.
+SQLITE_PRAGMAS = {
+    "journal_mode": os.environ.get("WPU_SQLITE_JOURNAL_MODE", "WAL"),
+    "synchronous": os.environ.get("WPU_SQLITE_SYNCHRONOUS", "NORMAL"),
+    "busy_timeout": os.environ.get("WPU_SQLITE_BUSY_TIMEOUT_MS", "10000"),
+    "mmap_size": os.environ.get("WPU_SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)),
+    "cache_size": os.environ.get("WPU_SQLITE_CACHE_SIZE", "-32000"), # Negative means KiB
+}
+POOL_SIZE = int(os.environ.get("WPU_DB_POOL_SIZE", 10))
+MAX_OVERFLOW = int(os.environ.get("WPU_DB_MAX_OVERFLOW", 20))
+POOL_TIMEOUT = int(os.environ.get("WPU_DB_POOL_TIMEOUT", 30))
+
+# Batch client comments through a background writer (see app/comment_queue.py)
+COMMENT_WRITE_BEHIND = os.environ.get("WPU_COMMENT_WRITE_BEHIND", "0").lower() in ("1", "true", "yes")
+
+# Per-project shard files (see the Sharding section); empty keeps everything in DB_PATH
+SHARD_DIR = os.environ.get("WPU_SHARD_DIR", "")
+SHARD_POOL_SIZE = int(os.environ.get("WPU_SHARD_POOL_SIZE", 2))
+
+def make_engine(url, pragmas=None, pool_size=POOL_SIZE):
+    """Creates a SQLite engine with the configured pragmas and pool sizing."""
+    pragmas = SQLITE_PRAGMAS if pragmas is None else pragmas
+    busy_timeout_ms = int(pragmas.get("busy_timeout") or 0)
+    new_engine = create_engine(
+        url,
+        connect_args={"check_same_thread": False, "timeout": busy_timeout_ms / 1000},
+        pool_size=pool_size,
+        max_overflow=MAX_OVERFLOW,
+        pool_timeout=POOL_TIMEOUT,
+    )
+
+    @sa.event.listens_for(new_engine, "connect")
+    def _apply_pragmas(dbapi_conn, _record):
+        # Let SQLAlchemy emit BEGIN itself (see _begin) instead of the driver's implicit transactions
+        dbapi_conn.isolation_level = None
+        cursor = dbapi_conn.cursor()
+        for name, value in pragmas.items():
+            if value not in (None, ""):
+                cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+    @sa.event.listens_for(new_engine, "begin")
+    def _begin(conn):
+        # Writers use BEGIN IMMEDIATE so they wait on busy_timeout up front; a deferred transaction
+        # that reads and then writes fails immediately if another writer committed in between.
+        conn.exec_driver_sql(f"BEGIN {conn.get_execution_options().get('sqlite_begin', 'DEFERRED')}")
+
+    return new_engine
+
 Base = declarative_base()
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False}) 
+CatalogBase = declarative_base() # Tables that only exist in the catalog (the main database) when sharded
+engine = make_engine(DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+_engine_pragmas = None # Pragmas passed to configure_engine, reused for shard engines
+
+def configure_engine(url=None, pragmas=None, shard_dir=None):
+    """
+    Rebinds the module to a different database (or pragma set), e.g. from benchmarks.
+    shard_dir switches sharding on (a directory) or off ("") for the new database.
+    """
+    global engine, DATABASE_URL, SHARD_DIR, _engine_pragmas
+    DATABASE_URL = url or DATABASE_URL
+    if shard_dir is not None:
+        SHARD_DIR = shard_dir
+    _engine_pragmas = pragmas
+    engine.dispose()
+    engine = make_engine(DATABASE_URL, pragmas)
+    SessionLocal.configure(bind=engine)
+    _reset_shards()
+    with _watch_lock:
+        for conn in _watch_conns.values():
+            conn.close()
+        _watch_conns.clear()
+    return engine
+
+def write_session():
+    """Session whose transaction starts with BEGIN IMMEDIATE (use for read-modify-write)."""
+    session = SessionLocal()
+    session.connection(execution_options={"sqlite_begin": "IMMEDIATE"})
+    return session
+
+@contextmanager
+def write_transaction(bind=None):
+    """Core connection in a BEGIN IMMEDIATE transaction, committed on exit (bind defaults to engine)."""
+    with (bind or engine).connect() as conn:
+        conn.execution_options(sqlite_begin="IMMEDIATE")
+        with conn.begin():
+            yield conn
 
 # --- Models ---
 
@@ -51,25 +148,277 @@ class Project(Base):
     current_progress = Column(Text, nullable=True)
     next_week_plan = Column(Text, nullable=True)
     
-    # New Fields for Logos and Carousel
-    client_logo_base64 = Column(Text, nullable=True) # Base64 string for client logo
-    kshitij_logo_base64 = Column(Text, nullable=True) # Base64 string for kshitij logo
-    carousel_images_json = Column(JSONEncodedDict, default=lambda: []) # List of image Base64 strings
+    # Logos and Carousel are stored in the blobs table; the row only keeps SHA-256 references
+    client_logo_ref = Column(String(64), nullable=True) # Blob reference for client logo
+    kshitij_logo_ref = Column(String(64), nullable=True) # Blob reference for kshitij logo
+    carousel_image_refs = Column(JSONEncodedDict, default=lambda: []) # List of blob references
     
-    updated_at = Column(String, default=datetime.utcnow().isoformat)
+    updated_at = Column(String, default=lambda: datetime.utcnow().isoformat()) # Also the cache version
+    version = Column(Integer, nullable=False, default=1, server_default=sa.text("1")) # Bumped on every write, for compare-and-swap
 
 class Comment(Base):
     __tablename__ = "comments"
+    __table_args__ = (
+        # Serves per-project listing and keyset pagination by id
+        sa.Index("ix_comments_project_code_id", "project_code", "id"),
+    )
     id = Column(Integer, primary_key=True, index=True)
     project_code = Column(String, nullable=False)
     client_name = Column(String, nullable=False)
     comment = Column(Text, nullable=False)
-    created_at = Column(String, default=datetime.utcnow().isoformat)
+    created_at = Column(String, default=lambda: datetime.utcnow().isoformat())
+
+class Blob(Base):
+    # Content-addressed image store: identical uploads (e.g. a logo shared by projects) are stored once
+    __tablename__ = "blobs"
+    sha256 = Column(String(64), primary_key=True)
+    mime_type = Column(String, nullable=False)
+    size = Column(Integer, nullable=False)
+    data = Column(LargeBinary, nullable=False)
+
+class ImageVariant(Base):
+    # Downscaled renditions of an uploaded image; image_ref is the SHA-256 of the original upload
+    __tablename__ = "image_variants"
+    image_ref = Column(String(64), primary_key=True)
+    variant = Column(String, primary_key=True)
+    width = Column(Integer, nullable=False)
+    height = Column(Integer, nullable=False)
+    blob_sha256 = Column(String(64), nullable=False)
+
+class ProjectSnapshot(Base):
+    # Append-only history, one row per save. Text fields are zlib-compressed into the blob store, so a
+    # week whose narrative didn't change reuses the previous blob; images are kept as references only.
+    __tablename__ = "project_snapshots"
+    __table_args__ = (
+        # Covers trend range queries: the metrics are read from the index without touching the table
+        sa.Index("ix_project_snapshots_code_captured", "project_code", "captured_at", "project_progress", "pending_rfi", "days_spent"),
+    )
+    id = Column(Integer, primary_key=True)
+    project_code = Column(String, nullable=False)
+    captured_at = Column(String, nullable=False) # The project's updated_at for this save
+    project_progress = Column(Integer)
+    pending_rfi = Column(Integer)
+    days_spent = Column(Integer)
+    text_ref = Column(String(64), nullable=False) # Blob reference for SNAPSHOT_TEXT_FIELDS
+    image_refs = Column(JSONEncodedDict) # {"client_logo_ref", "kshitij_logo_ref", "carousel_image_refs"}
+
+class ProjectSummary(Base):
+    # One row per project for the admin portfolio overview, kept current by the project save and
+    # comment insert paths so the overview never loads full projects or scans comments.
+    __tablename__ = "project_summaries"
+    project_code = Column(String, primary_key=True)
+    project_name = Column(String)
+    project_progress = Column(Integer)
+    pending_rfi = Column(Integer)
+    days_spent = Column(Integer)
+    updated_at = Column(String)
+    comment_count = Column(Integer, nullable=False, default=0)
+    last_comment_at = Column(String)
+
+class CommentWeeklyRollup(Base):
+    # Comment counts per project and ISO week, maintained by the comment insert path
+    __tablename__ = "comment_weekly_rollups"
+    __table_args__ = (
+        sa.Index("ix_comment_weekly_rollups_week_start", "week_start"),
+    )
+    project_code = Column(String, primary_key=True)
+    iso_week = Column(String, primary_key=True) # e.g. "2024-W07"
+    week_start = Column(String, nullable=False) # Monday of the ISO week, YYYY-MM-DD
+    comment_count = Column(Integer, nullable=False, default=0)
+
+class CommentClientRollup(Base):
+    # Comment counts per project and reviewer, maintained by the comment insert path
+    __tablename__ = "comment_client_rollups"
+    project_code = Column(String, primary_key=True)
+    client_name = Column(String, primary_key=True)
+    comment_count = Column(Integer, nullable=False, default=0)
+    first_comment_at = Column(String)
+    last_comment_at = Column(String)
+
+class ProjectShard(CatalogBase):
+    # Directory of per-project shard files, kept in the catalog when WPU_SHARD_DIR is set
+    __tablename__ = "project_shards"
+    project_code = Column(String, primary_key=True)
+    shard_id = Column(Integer, nullable=False, unique=True) # File name and comment id range
+    created_at = Column(String, default=lambda: datetime.utcnow().isoformat())
+
+# Pre-blob schema stored full data URLs inline; init_db moves them into the blobs table
+LEGACY_IMAGE_COLUMNS = {
+    "client_logo_base64": "client_logo_ref",
+    "kshitij_logo_base64": "kshitij_logo_ref",
+    "carousel_images_json": "carousel_image_refs",
+}
 
 # --- DB Functions ---
 
+def _chunks(seq, n=500):
+    """Yields lists of at most n items, keeping IN (...) lists under SQLite's bound-parameter limit."""
+    seq = list(seq)
+    for start in range(0, len(seq), n):
+        yield seq[start:start + n]
+
 def init_db():
-    Base.metadata.create_all(bind=engine)
+    _init_database(engine)
+    if SHARD_DIR:
+        init_catalog()
+        with engine.connect() as conn:
+            if conn.execute(sa.text("SELECT 1 FROM projects LIMIT 1")).first() is not None:
+                raise RuntimeError(
+                    f"{engine.url.database} still holds unsharded projects; run python -m app.shards split first."
+                )
+        for bind in project_binds():
+            _init_database(bind)
+
+def _init_database(bind):
+    """Creates and migrates the schema of one database file (the main database or a shard)."""
+    Base.metadata.create_all(bind=bind)
+    _create_missing_indexes(bind)
+    _migrate_inline_images(bind)
+    _create_comment_search(bind)
+    _backfill_snapshots(bind)
+    _backfill_project_summaries(bind)
+    _backfill_comment_rollups(bind)
+
+def _create_missing_indexes(bind):
+    """create_all skips indexes on tables that already exist, so add any new ones here."""
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=bind, checkfirst=True)
+
+# Full-text index over comments. External-content FTS5 stores only the index; the text stays in
+# `comments`, and the triggers below keep the two in sync.
+COMMENT_SEARCH_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS comments_fts USING fts5(
+        comment, client_name, project_code, content='comments', content_rowid='id', tokenize='porter unicode61')""",
+    """CREATE TRIGGER IF NOT EXISTS comments_fts_ai AFTER INSERT ON comments BEGIN
+        INSERT INTO comments_fts(rowid, comment, client_name, project_code)
+        VALUES (new.id, new.comment, new.client_name, new.project_code);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS comments_fts_ad AFTER DELETE ON comments BEGIN
+        INSERT INTO comments_fts(comments_fts, rowid, comment, client_name, project_code)
+        VALUES ('delete', old.id, old.comment, old.client_name, old.project_code);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS comments_fts_au AFTER UPDATE ON comments BEGIN
+        INSERT INTO comments_fts(comments_fts, rowid, comment, client_name, project_code)
+        VALUES ('delete', old.id, old.comment, old.client_name, old.project_code);
+        INSERT INTO comments_fts(rowid, comment, client_name, project_code)
+        VALUES (new.id, new.comment, new.client_name, new.project_code);
+    END""",
+]
+COMMENT_SEARCH_AVAILABLE = False
+
+def _create_comment_search(bind):
+    """Creates the FTS5 index and triggers, backfilling existing comments the first time."""
+    global COMMENT_SEARCH_AVAILABLE
+    try:
+        with write_transaction(bind) as conn:
+            is_new = conn.execute(sa.text("SELECT 1 FROM sqlite_master WHERE name = 'comments_fts'")).first() is None
+            for statement in COMMENT_SEARCH_DDL:
+                conn.execute(sa.text(statement))
+            if is_new:
+                conn.execute(sa.text("INSERT INTO comments_fts(comments_fts) VALUES ('rebuild')"))
+        COMMENT_SEARCH_AVAILABLE = True
+    except sa.exc.OperationalError as e:
+        # SQLite builds without FTS5 still run the app, just without comment search
+        print(f"Comment search disabled: {e}")
+
+def _add_missing_columns(conn, table):
+    """Adds columns declared on the model but missing from an older SQLite table."""
+    existing = {c["name"] for c in sa.inspect(conn).get_columns(table.name)}
+    for column in table.columns:
+        if column.name not in existing:
+            col_type = column.type.compile(dialect=conn.dialect)
+            if column.server_default is not None:
+                col_type += f" NOT NULL DEFAULT {column.server_default.arg.text}"
+            conn.execute(sa.text(f'ALTER TABLE {table.name} ADD COLUMN "{column.name}" {col_type}'))
+    return existing
+
+def _migrate_inline_images(bind):
+    """One-time move of inline base64 images on `projects` into the blob store."""
+    with write_transaction(bind) as conn:
+        existing = _add_missing_columns(conn, Project.__table__)
+        legacy = [c for c in LEGACY_IMAGE_COLUMNS if c in existing]
+        if not legacy:
+            return
+        rows = conn.execute(sa.text(f"SELECT id, {', '.join(legacy)} FROM projects")).mappings().all()
+        for row in rows:
+            updates = {}
+            for old_col in legacy:
+                value = row[old_col]
+                if not value:
+                    continue
+                new_col = LEGACY_IMAGE_COLUMNS[old_col]
+                if old_col == "carousel_images_json":
+                    urls = json.loads(value) or []
+                    updates[new_col] = json.dumps([_put_blob_conn(conn, *parse_data_url(u)) for u in urls])
+                else:
+                    updates[new_col] = _put_blob_conn(conn, *parse_data_url(value))
+                updates[old_col] = None
+            if updates:
+                assignments = ", ".join(f"{col} = :{col}" for col in updates)
+                conn.execute(sa.text(f"UPDATE projects SET {assignments} WHERE id = :id"), {**updates, "id": row["id"]})
+
+# --- Blob Store ---
+
+def blob_sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+def parse_data_url(data_url: str):
+    """Splits a `data:<mime>;base64,<payload>` URL into (bytes, mime_type)."""
+    header, _, payload = data_url.partition(",")
+    mime_type = header[len("data:"):].split(";")[0] or "application/octet-stream"
+    return base64.b64decode(payload), mime_type
+
+def _put_blob_conn(conn, data: bytes, mime_type: str) -> str:
+    sha = blob_sha256(data)
+    conn.execute(
+        sa.text("INSERT OR IGNORE INTO blobs (sha256, mime_type, size, data) VALUES (:sha, :mime, :size, :data)"),
+        {"sha": sha, "mime": mime_type, "size": len(data), "data": data},
+    )
+    return sha
+
+def put_blob(data: bytes, mime_type: str) -> str:
+    """Stores bytes once under their SHA-256 and returns the reference."""
+    with write_transaction() as conn:
+        return _put_blob_conn(conn, data, mime_type)
+
+def get_blob(sha256: str):
+    session = SessionLocal()
+    try:
+        blob = session.get(Blob, sha256)
+        if blob:
+            return {"sha256": blob.sha256, "mime_type": blob.mime_type, "size": blob.size, "data": blob.data}
+        return None
+    finally:
+        session.close()
+
+def blob_data_url(sha256: str):
+    """Returns the blob as a data URL suitable for HTML img src, or None if missing."""
+    if not sha256:
+        return None
+    blob = get_blob(sha256)
+    if blob is None:
+        return None
+    return f"data:{blob['mime_type']};base64,{base64.b64encode(blob['data']).decode('utf-8')}"
+
+# Dedicated connections for change detection: PRAGMA data_version only moves when *another*
+# connection commits, so they must not be shared with the pooled connections that write.
+_watch_conns = {} # database path -> connection
+_watch_lock = threading.Lock()
+
+def data_version(project_code=None):
+    """
+    Returns SQLite's data_version counter; it changes whenever any other connection commits.
+    When sharded, pass a project code to watch that project's shard (0 for an unknown project).
+    """
+    bind = engine if project_code is None else _bind_for(project_code)
+    if bind is None:
+        return 0
+    path = bind.url.database
+    with _watch_lock:
+        if path not in _watch_conns:
+            _watch_conns[path] = sqlite3.connect(path, check_same_thread=False)
+        return _watch_conns[path].execute("PRAGMA data_version").fetchone()[0]
 
 def get_db():
     db = SessionLocal()
@@ -79,7 +428,10 @@ def get_db():
         db.close()
 
 def get_project_by_code(project_code: str):
-    session = SessionLocal()
+    bind = _bind_for(project_code)
+    if bind is None:
+        return None
+    session = SessionLocal(bind=bind)
     try:
         # Use session.execute and mapping for better column handling if schema evolves
         project_data = session.query(Project).filter(Project.project_code == project_code).first()
@@ -92,7 +444,21 @@ def get_project_by_code(project_code: str):
     finally:
         session.close()
 
+def get_project_version(project_code: str):
+    """Returns the project's updated_at without loading the row, or None if it doesn't exist."""
+    bind = _bind_for(project_code)
+    if bind is None:
+        return None
+    session = SessionLocal(bind=bind)
+    try:
+        row = session.query(Project.updated_at).filter(Project.project_code == project_code).first()
+        return row[0] if row else None
+    finally:
+        session.close()
+
 def list_project_codes():
+    if SHARD_DIR:
+        return list(_load_shard_directory())
     session = SessionLocal()
     try:
         projects = session.query(Project.project_code).all()
@@ -100,55 +466,662 @@ def list_project_codes():
     finally:
         session.close()
 
-def upsert_project(data: dict):
-    session = SessionLocal()
+# --- Project Snapshots ---
+
+SNAPSHOT_TEXT_FIELDS = [
+    "project_name", "title", "model_review_link", "rfi_sheet_link", "alert_note", "current_progress", "next_week_plan",
+]
+SNAPSHOT_IMAGE_FIELDS = ["client_logo_ref", "kshitij_logo_ref", "carousel_image_refs"]
+SNAPSHOT_TEXT_MIME = "application/json+zlib"
+
+def _capture_snapshots_conn(conn, project_codes):
+    """Appends a snapshot of the current row for each project code, inside the caller's transaction."""
+    table = Project.__table__
+    rows = []
+    for chunk in _chunks(project_codes):
+        for project in conn.execute(sa.select(table).where(table.c.project_code.in_(chunk))).mappings():
+            text = json.dumps({f: project[f] for f in SNAPSHOT_TEXT_FIELDS}, sort_keys=True).encode("utf-8")
+            rows.append({
+                "project_code": project["project_code"],
+                "captured_at": project["updated_at"],
+                "project_progress": project["project_progress"],
+                "pending_rfi": project["pending_rfi"],
+                "days_spent": project["days_spent"],
+                "text_ref": _put_blob_conn(conn, zlib.compress(text, 9), SNAPSHOT_TEXT_MIME),
+                "image_refs": {f: project[f] for f in SNAPSHOT_IMAGE_FIELDS},
+            })
+    if rows:
+        conn.execute(ProjectSnapshot.__table__.insert(), rows)
+
+def _backfill_snapshots(bind):
+    """Gives projects saved before snapshots existed a starting point in their history."""
+    with write_transaction(bind) as conn:
+        codes = conn.execute(sa.text(
+            "SELECT project_code FROM projects WHERE project_code NOT IN (SELECT project_code FROM project_snapshots)"
+        )).scalars().all()
+        _capture_snapshots_conn(conn, codes)
+
+def list_project_snapshots(project_code, since=None, until=None, with_text=False):
+    """
+    Snapshots for one project with since <= captured_at < until (ISO strings), oldest first.
+    Without with_text only the metrics are returned, read straight from the covering index.
+    """
+    table = ProjectSnapshot.__table__
+    columns = [table.c.captured_at, table.c.project_progress, table.c.pending_rfi, table.c.days_spent]
+    if with_text:
+        columns += [table.c.text_ref, table.c.image_refs]
+    statement = sa.select(*columns).where(table.c.project_code == project_code).order_by(table.c.captured_at)
+    if since:
+        statement = statement.where(table.c.captured_at >= str(since))
+    if until:
+        statement = statement.where(table.c.captured_at < str(until))
+    bind = _bind_for(project_code)
+    if bind is None:
+        return []
+    with bind.connect() as conn:
+        snapshots = [dict(row) for row in conn.execute(statement).mappings()]
+        if with_text:
+            texts = {} # Consecutive weeks often share a blob
+            for snapshot in snapshots:
+                ref = snapshot.pop("text_ref")
+                if ref not in texts:
+                    data = conn.execute(sa.select(Blob.data).where(Blob.sha256 == ref)).scalar()
+                    texts[ref] = json.loads(zlib.decompress(data)) if data else {}
+                snapshot.update(texts[ref])
+                snapshot.update(snapshot.pop("image_refs") or {})
+    return snapshots
+
+# --- Project Summaries ---
+
+SUMMARY_PROJECT_FIELDS = ["project_name", "project_progress", "pending_rfi", "days_spent", "updated_at"]
+
+def _refresh_project_summaries_conn(conn, project_codes):
+    """Copies the summary fields of the given projects into project_summaries, keeping comment stats."""
+    columns = ", ".join(SUMMARY_PROJECT_FIELDS)
+    assignments = ", ".join(f"{f} = excluded.{f}" for f in SUMMARY_PROJECT_FIELDS)
+    statement = sa.text(
+        f"INSERT INTO project_summaries (project_code, {columns}, comment_count) "
+        f"SELECT project_code, {columns}, 0 FROM projects WHERE project_code IN :codes "
+        f"ON CONFLICT(project_code) DO UPDATE SET {assignments}"
+    ).bindparams(sa.bindparam("codes", expanding=True))
+    for chunk in _chunks(project_codes):
+        conn.execute(statement, {"codes": chunk})
+
+def _count_comments_conn(conn, rows):
+    """Adds newly inserted comment rows to the per-project counts and last-comment times."""
+    stats = {}
+    for row in rows:
+        count, last = stats.get(row["project_code"], (0, ""))
+        stats[row["project_code"]] = (count + 1, max(last, row["created_at"]))
+    conn.execute(
+        sa.text(
+            "INSERT INTO project_summaries (project_code, comment_count, last_comment_at) VALUES (:code, :count, :last) "
+            "ON CONFLICT(project_code) DO UPDATE SET comment_count = comment_count + excluded.comment_count, "
+            "last_comment_at = max(coalesce(last_comment_at, ''), excluded.last_comment_at)"
+        ),
+        [{"code": code, "count": count, "last": last} for code, (count, last) in stats.items()],
+    )
+
+def rebuild_project_summaries():
+    """Recomputes every summary row from projects and comments."""
+    for bind in project_binds():
+        _rebuild_project_summaries(bind)
+
+def _rebuild_project_summaries(bind):
+    columns = ", ".join(SUMMARY_PROJECT_FIELDS)
+    with write_transaction(bind) as conn:
+        conn.execute(sa.text("DELETE FROM project_summaries"))
+        conn.execute(sa.text(
+            f"INSERT INTO project_summaries (project_code, {columns}, comment_count, last_comment_at) "
+            f"SELECT p.project_code, {', '.join('p.' + f for f in SUMMARY_PROJECT_FIELDS)}, coalesce(c.n, 0), c.last "
+            "FROM projects p LEFT JOIN (SELECT project_code, count(*) AS n, max(created_at) AS last "
+            "FROM comments GROUP BY project_code) c ON c.project_code = p.project_code"
+        ))
+
+def _backfill_project_summaries(bind):
+    with bind.connect() as conn:
+        empty = conn.execute(sa.text("SELECT 1 FROM project_summaries LIMIT 1")).first() is None
+        has_projects = conn.execute(sa.text("SELECT 1 FROM projects LIMIT 1")).first() is not None
+    if empty and has_projects:
+        _rebuild_project_summaries(bind)
+
+def list_project_summaries():
+    """The portfolio overview: one row per project from project_summaries, ordered by code."""
+    table = ProjectSummary.__table__
+    statement = sa.select(table).where(table.c.project_name.is_not(None)).order_by(table.c.project_code)
+    summaries = []
+    for bind in project_binds():
+        with bind.connect() as conn:
+            summaries.extend(dict(row) for row in conn.execute(statement).mappings())
+    return sorted(summaries, key=lambda row: row["project_code"])
+
+# --- Comment Rollups ---
+
+def _iso_week(created_at):
+    """ISO week key and its Monday for a created_at timestamp string."""
+    day = date.fromisoformat(created_at[:10])
+    year, week, _ = day.isocalendar()
+    return f"{year}-W{week:02d}", date.fromisocalendar(year, week, 1).isoformat()
+
+def _comment_rollup_rows(rows):
+    """Aggregates comment rows into weekly and per-client rollup increments."""
+    weekly, clients = {}, {}
+    for row in rows:
+        iso_week, week_start = _iso_week(row["created_at"])
+        key = (row["project_code"], iso_week)
+        entry = weekly.setdefault(key, {"project_code": key[0], "iso_week": iso_week, "week_start": week_start, "comment_count": 0})
+        entry["comment_count"] += 1
+        key = (row["project_code"], row["client_name"])
+        entry = clients.setdefault(key, {
+            "project_code": key[0], "client_name": key[1], "comment_count": 0,
+            "first_comment_at": row["created_at"], "last_comment_at": row["created_at"],
+        })
+        entry["comment_count"] += 1
+        entry["first_comment_at"] = min(entry["first_comment_at"], row["created_at"])
+        entry["last_comment_at"] = max(entry["last_comment_at"], row["created_at"])
+    return list(weekly.values()), list(clients.values())
+
+def _roll_up_comments_conn(conn, rows):
+    """Adds newly inserted comment rows to the weekly and per-client rollups."""
+    weekly, clients = _comment_rollup_rows(rows)
+    if weekly:
+        conn.execute(sa.text(
+            "INSERT INTO comment_weekly_rollups (project_code, iso_week, week_start, comment_count) "
+            "VALUES (:project_code, :iso_week, :week_start, :comment_count) "
+            "ON CONFLICT(project_code, iso_week) DO UPDATE SET comment_count = comment_count + excluded.comment_count"
+        ), weekly)
+    if clients:
+        conn.execute(sa.text(
+            "INSERT INTO comment_client_rollups (project_code, client_name, comment_count, first_comment_at, last_comment_at) "
+            "VALUES (:project_code, :client_name, :comment_count, :first_comment_at, :last_comment_at) "
+            "ON CONFLICT(project_code, client_name) DO UPDATE SET comment_count = comment_count + excluded.comment_count, "
+            "first_comment_at = min(coalesce(first_comment_at, excluded.first_comment_at), excluded.first_comment_at), "
+            "last_comment_at = max(coalesce(last_comment_at, ''), excluded.last_comment_at)"
+        ), clients)
+
+def rebuild_comment_rollups(batch_size=10000):
+    """Recomputes both rollups from the comments table, streaming it in batches."""
+    for bind in project_binds():
+        _rebuild_comment_rollups(bind, batch_size)
+
+def _rebuild_comment_rollups(bind, batch_size=10000):
+    table = Comment.__table__
+    statement = sa.select(table.c.project_code, table.c.client_name, table.c.created_at)
+    with write_transaction(bind) as conn:
+        conn.execute(sa.text("DELETE FROM comment_weekly_rollups"))
+        conn.execute(sa.text("DELETE FROM comment_client_rollups"))
+        result = conn.execution_options(yield_per=batch_size).execute(statement).mappings()
+        for rows in result.partitions():
+            # Rows are aggregated per batch; the upserts fold batches together
+            _roll_up_comments_conn(conn, rows)
+
+def _backfill_comment_rollups(bind):
+    with bind.connect() as conn:
+        empty = conn.execute(sa.text("SELECT 1 FROM comment_weekly_rollups LIMIT 1")).first() is None
+        has_comments = conn.execute(sa.text("SELECT 1 FROM comments LIMIT 1")).first() is not None
+    if empty and has_comments:
+        _rebuild_comment_rollups(bind)
+
+def list_weekly_comment_counts(project_code=None, since=None, until=None):
+    """
+    Comments per project and ISO week with since <= week_start < until (dates or ISO strings),
+    oldest week first, for one project or all of them.
+    """
+    table = CommentWeeklyRollup.__table__
+    statement = sa.select(table).order_by(table.c.week_start, table.c.project_code)
+    if project_code is not None:
+        statement = statement.where(table.c.project_code == project_code)
+    if since:
+        statement = statement.where(table.c.week_start >= str(since))
+    if until:
+        statement = statement.where(table.c.week_start < str(until))
+    weeks = []
+    for bind in project_binds(project_code):
+        with bind.connect() as conn:
+            weeks.extend(dict(row) for row in conn.execute(statement).mappings())
+    return sorted(weeks, key=lambda row: (row["week_start"], row["project_code"]))
+
+def list_top_reviewers(project_code=None, limit=10):
+    """Most active reviewers by comment count, for one project or summed across all projects."""
+    table = CommentClientRollup.__table__
+    count = sa.func.sum(table.c.comment_count).label("comment_count")
+    statement = sa.select(
+        table.c.client_name,
+        count,
+        sa.func.count().label("project_count"),
+        sa.func.min(table.c.first_comment_at).label("first_comment_at"),
+        sa.func.max(table.c.last_comment_at).label("last_comment_at"),
+    ).group_by(table.c.client_name).order_by(count.desc(), table.c.client_name)
+    if project_code is not None:
+        statement = statement.where(table.c.project_code == project_code)
+    binds = project_binds(project_code)
+    if len(binds) == 1:
+        with binds[0].connect() as conn:
+            return [dict(row) for row in conn.execute(statement.limit(limit)).mappings()]
+    # Shards: combine each shard's per-client totals
+    reviewers = {}
+    for bind in binds:
+        with bind.connect() as conn:
+            for row in conn.execute(statement).mappings():
+                merged = reviewers.setdefault(row["client_name"], {**row, "comment_count": 0, "project_count": 0})
+                merged["comment_count"] += row["comment_count"]
+                merged["project_count"] += row["project_count"]
+                merged["first_comment_at"] = min(merged["first_comment_at"], row["first_comment_at"])
+                merged["last_comment_at"] = max(merged["last_comment_at"], row["last_comment_at"])
+    return sorted(reviewers.values(), key=lambda r: (-r["comment_count"], r["client_name"]))[:limit]
+
+class ProjectVersionConflict(Exception):
+    """Raised by upsert_project when the stored project changed since the caller read it."""
+
+    def __init__(self, project_code, expected_version, current):
+        self.project_code = project_code
+        self.expected_version = expected_version
+        self.current = current # The stored row as a dict, or None if it doesn't exist
+        current_version = current["version"] if current else 0
+        super().__init__(
+            f"Project '{project_code}' was changed by someone else (expected version {expected_version}, found {current_version})."
+        )
+
+def _same_value(stored, new):
+    # The form sends "" and [] where the database holds NULL
+    return stored == new or (stored in (None, "", []) and new in (None, "", []))
+
+def upsert_project(data: dict, expected_version=None):
+    """
+    Creates or updates a project, writing only the columns whose values changed; a save that changes
+    nothing is skipped entirely. expected_version makes the save a compare-and-swap: 0 means the
+    project must not exist yet, any other value must equal the stored version, otherwise
+    ProjectVersionConflict is raised and nothing is written.
+    Returns {"status": "created" | "updated" | "unchanged", "version": n, "changed": [column names]}.
+    """
+    table = Project.__table__
+    project_code = data['project_code']
+    fields = {k: v for k, v in data.items() if k in table.c and k not in ("id", "version", "updated_at")}
+    with write_transaction(_bind_for(project_code, create=True)) as conn:
+        current = conn.execute(sa.select(table).where(table.c.project_code == project_code)).mappings().first()
+        current_version = current["version"] if current else 0
+        if expected_version is not None and expected_version != current_version:
+            raise ProjectVersionConflict(project_code, expected_version, dict(current) if current else None)
+
+        now = datetime.utcnow().isoformat()
+        if current is None:
+            conn.execute(table.insert().values(**fields, version=1, updated_at=now))
+            result = {"status": "created", "version": 1, "changed": sorted(fields)}
+        else:
+            changed = {k: v for k, v in fields.items() if not _same_value(current[k], v)}
+            if not changed:
+                return {"status": "unchanged", "version": current_version, "changed": []}
+            # Version in the WHERE clause keeps the swap atomic even outside BEGIN IMMEDIATE
+            conn.execute(
+                table.update()
+                .where(table.c.project_code == project_code, table.c.version == current_version)
+                .values(**changed, version=current_version + 1, updated_at=now)
+            )
+            result = {"status": "updated", "version": current_version + 1, "changed": sorted(changed)}
+        _capture_snapshots_conn(conn, [project_code])
+        _refresh_project_summaries_conn(conn, [project_code])
+    return result
+
+# Columns a bulk import may set; images are managed through the admin form only
+BULK_PROJECT_FIELDS = [
+    "project_code", "project_name", "title", "project_progress", "pending_rfi", "days_spent",
+    "model_review_link", "rfi_sheet_link", "alert_note", "current_progress", "next_week_plan",
+]
+
+def bulk_upsert_projects(rows: list):
+    """
+    Creates or updates many projects in one transaction with INSERT ... ON CONFLICT DO UPDATE
+    (one transaction per shard when sharded). Rows whose values already match the database are skipped.
+    Returns {"created": n, "updated": n, "unchanged": n}.
+    """
+    counts = {"created": 0, "updated": 0, "unchanged": 0}
+    for bind, shard_rows in _group_by_bind(rows):
+        with write_transaction(bind) as conn:
+            _bulk_upsert_projects_conn(conn, shard_rows, counts)
+    return counts
+
+def _bulk_upsert_projects_conn(conn, rows, counts):
+    table = Project.__table__
+    existing = {}
+    codes = [row["project_code"] for row in rows]
+    columns = [table.c[name] for name in BULK_PROJECT_FIELDS]
+    for chunk in _chunks(codes):
+        for found in conn.execute(sa.select(*columns).where(table.c.project_code.in_(chunk))).mappings():
+            existing[found["project_code"]] = dict(found)
+
+    now = datetime.utcnow().isoformat()
+    changed_by_keys = {} # executemany needs identical keys per statement
+    for row in rows:
+        current = existing.get(row["project_code"])
+        if current is None:
+            counts["created"] += 1
+        elif all(current.get(key) == value for key, value in row.items()):
+            counts["unchanged"] += 1
+            continue
+        else:
+            counts["updated"] += 1
+        changed_by_keys.setdefault(tuple(sorted(row)), []).append({**row, "updated_at": now})
+
+    for keys, batch in changed_by_keys.items():
+        statement = sqlite_insert(table)
+        statement = statement.on_conflict_do_update(
+            index_elements=[table.c.project_code],
+            set_={
+                **{key: statement.excluded[key] for key in keys + ("updated_at",) if key != "project_code"},
+                "version": table.c.version + 1,
+            },
+        )
+        conn.execute(statement, batch)
+    changed_codes = [row["project_code"] for batch in changed_by_keys.values() for row in batch]
+    _capture_snapshots_conn(conn, changed_codes)
+    _refresh_project_summaries_conn(conn, changed_codes)
+
+def add_comment(project_code, client_name, comment_text):
+    """
+    Saves a client comment. With WPU_COMMENT_WRITE_BEHIND enabled the row is queued and committed
+    in a batch by a background writer; either way this returns once the comment is committed (or
+    raises CommentWriteTimeout if the writer doesn't commit it within WPU_COMMENT_COMMIT_TIMEOUT).
+    """
+    row = {
+        "project_code": project_code,
+        "client_name": client_name,
+        "comment": comment_text,
+        "created_at": datetime.utcnow().isoformat(),
+    }
+    if COMMENT_WRITE_BEHIND:
+        # Imported lazily: comment_queue imports this module
+        from app.comment_queue import COMMIT_TIMEOUT, CommentWriteTimeout, get_comment_writer
+        future = get_comment_writer().submit(row)
+        try:
+            future.result(timeout=COMMIT_TIMEOUT)
+        except FutureTimeoutError:
+            raise CommentWriteTimeout("Saving your comment is taking longer than expected. Please refresh before submitting it again.")
+    else:
+        insert_comments([row])
+
+def insert_comments(rows: list):
+    """Inserts comment rows in a single transaction (one executemany; one per shard when sharded)."""
+    if not rows:
+        return
+    for bind, shard_rows in _group_by_bind(rows):
+        with write_transaction(bind) as conn:
+            _insert_comments_conn(conn, shard_rows)
+
+def _insert_comments_conn(conn, rows):
+    id_base = conn.get_execution_options().get("comment_id_base")
+    if id_base is not None:
+        # Each shard hands out ids from its own range, so comment ids stay unique across projects
+        next_id = max(conn.execute(sa.select(sa.func.max(Comment.id))).scalar() or 0, id_base) + 1
+        rows = [{**row, "id": next_id + i} for i, row in enumerate(rows)]
+    conn.execute(Comment.__table__.insert(), rows)
+    _count_comments_conn(conn, rows)
+    _roll_up_comments_conn(conn, rows)
+
+def list_comments(project_code, before_id=None, after_id=None, page_size=500):
+    """
+    Keyset-paginated comments for a project, newest first.
+    - before_id: the page of older comments below this id (for scrolling back).
+    - after_id: the oldest page_size comments above this id (for incremental refresh);
+      call again with the largest returned id until fewer than page_size come back.
+    """
+    bind = _bind_for(project_code)
+    if bind is None:
+        return []
+    session = SessionLocal(bind=bind)
     try:
-        project_code = data['project_code']
-        project = session.query(Project).filter(Project.project_code == project_code).first()
-        
-        if not project:
-            # New Project
-            project = Project(**data)
-            session.add(project)
+        query = session.query(Comment).filter(Comment.project_code == project_code)
+        if before_id is not None:
+            query = query.filter(Comment.id < before_id)
+        if after_id is not None:
+            comments = query.filter(Comment.id > after_id)\
+                .order_by(Comment.id.asc())\
+                .limit(page_size).all()
+            comments.reverse()
         else:
-            # Update Existing Project
-            for key, value in data.items():
-                if key != 'id': # Don't update the primary key
-                    setattr(project, key, value)
-            project.updated_at = datetime.utcnow().isoformat()
-        session.commit()
-    except Exception as e:
-        session.rollback()
-        raise e
+            comments = query.order_by(Comment.id.desc()).limit(page_size).all()
+        # Return as list of dicts for pandas
+        return [{
+            "id": c.id,
+            "Client": c.client_name,
+            "Comment": c.comment,
+            "Timestamp (UTC)": c.created_at
+        } for c in comments]
     finally:
         session.close()
 
-def add_comment(project_code, client_name, comment_text):
+def get_latest_comment_id(project_code=None):
+    """Largest comment id for a project, or overall when project_code is None (0 if none)."""
+    table = Comment.__table__
+    statement = sa.select(sa.func.max(table.c.id))
+    if project_code is not None:
+        statement = statement.where(table.c.project_code == project_code) # (project_code, id) index
+    latest = 0
+    for bind in project_binds(project_code):
+        with bind.connect() as conn:
+            latest = max(latest, conn.execute(statement).scalar() or 0)
+    return latest
+
+NEW_COMMENTS_PAGE = 1000
+
+def list_new_comments(after_id, project_code=None, limit=NEW_COMMENTS_PAGE):
+    """
+    Comments with id > after_id, oldest first, across all projects unless one is given.
+    Shards number comments in separate ranges, so a project code is required when sharded.
+    """
+    if SHARD_DIR and project_code is None:
+        raise ValueError("list_new_comments needs a project_code when the database is sharded.")
+    table = Comment.__table__
+    statement = sa.select(table).where(table.c.id > after_id).order_by(table.c.id).limit(limit)
+    if project_code is not None:
+        statement = statement.where(table.c.project_code == project_code)
+    rows = []
+    for bind in project_binds(project_code):
+        with bind.connect() as conn:
+            rows.extend(dict(row) for row in conn.execute(statement).mappings())
+    return rows
+
+def _fts_phrase(text: str) -> str:
+    return '"' + text.replace('"', '""') + '"'
+
+def _fts_query(text: str, project_code=None, client_name=None) -> str:
+    """
+    Turns free text into an FTS5 query over the comment column: every word must match, the last
+    one as a prefix. Project/client filters are added as column phrases so FTS5 intersects their
+    postings before ranking; callers still compare the exact values.
+    """
+    words = text.split()
+    if not words:
+        return ""
+    terms = [_fts_phrase(w) for w in words[:-1]] + [_fts_phrase(words[-1]) + "*"]
+    query = "comment : (" + " ".join(terms) + ")"
+    if project_code:
+        query += f" AND project_code : {_fts_phrase(project_code)}"
+    if client_name:
+        query += f" AND client_name : {_fts_phrase(client_name)}"
+    return query
+
+def search_comments(text, project_code=None, client_name=None, page=1, page_size=50):
+    """
+    Ranked (BM25) full-text search over comments, optionally filtered by project and client.
+    Returns {"results": [...], "has_more": bool} for the requested 1-based page. When sharded, an
+    all-project search ranks each shard's matches by its own index statistics and merges them.
+    """
+    query = _fts_query(text or "", project_code, client_name)
+    if not query or not COMMENT_SEARCH_AVAILABLE:
+        return {"results": [], "has_more": False}
+    sql = """
+        SELECT c.id, c.project_code, c.client_name, c.comment, c.created_at,
+               snippet(comments_fts, 0, '**', '**', '…', 16) AS snippet,
+               bm25(comments_fts, 1.0, 0.0, 0.0) AS score
+        FROM comments_fts
+        JOIN comments c ON c.id = comments_fts.rowid
+        WHERE comments_fts MATCH :query
+    """
+    offset = (max(page, 1) - 1) * page_size
+    params = {"query": query, "limit": page_size + 1, "offset": offset}
+    if project_code:
+        sql += " AND c.project_code = :project_code"
+        params["project_code"] = project_code
+    if client_name:
+        sql += " AND c.client_name = :client_name"
+        params["client_name"] = client_name
+    # Only the comment text contributes to the score
+    sql += " ORDER BY score LIMIT :limit OFFSET :offset"
+    binds = project_binds(project_code)
+    if len(binds) == 1:
+        with binds[0].connect() as conn:
+            rows = conn.execute(sa.text(sql), params).mappings().all()
+    else:
+        # Each shard returns everything up to the end of the page; the merged list is then sliced
+        params.update(limit=offset + page_size + 1, offset=0)
+        rows = []
+        for bind in binds:
+            with bind.connect() as conn:
+                rows.extend(conn.execute(sa.text(sql), params).mappings().all())
+        rows = sorted(rows, key=lambda r: r["score"])[offset:offset + page_size + 1]
+    return {
+        "results": [{
+            "id": r["id"],
+            "Project": r["project_code"],
+            "Client": r["client_name"],
+            "Match": r["snippet"],
+            "Comment": r["comment"],
+            "Timestamp (UTC)": r["created_at"],
+        } for r in rows[:page_size]],
+        "has_more": len(rows) > page_size,
+    }
+
+# --- Sharding ---
+# With WPU_SHARD_DIR set, each project's rows (project, comments and their search index, snapshots,
+# summary and rollups) live in their own SQLite file, so a burst of writes on one project never
+# waits on another project's write lock. The main database becomes the catalog: it keeps the
+# project_shards directory and the shared, content-addressed image store (blobs and variants).
+# Cross-project reads open every shard and merge the results.
+
+_shard_lock = threading.Lock()
+_shard_directory = {} # project_code -> shard_id
+_shard_engines = {} # shard_id -> engine
+COMMENT_ID_BITS = 32 # Shard n numbers its new comments from n << COMMENT_ID_BITS
+
+def shard_path(shard_id):
+    return os.path.join(SHARD_DIR, f"shard-{shard_id:05d}.db")
+
+def init_catalog():
+    """Creates the shard directory table in the main database."""
+    CatalogBase.metadata.create_all(bind=engine)
+
+def _shard_engine(shard_id):
+    with _shard_lock:
+        if shard_id not in _shard_engines:
+            os.makedirs(SHARD_DIR, exist_ok=True)
+            shard = make_engine(f"sqlite:///{shard_path(shard_id)}", _engine_pragmas, pool_size=SHARD_POOL_SIZE)
+            _shard_engines[shard_id] = shard.execution_options(comment_id_base=shard_id << COMMENT_ID_BITS)
+        return _shard_engines[shard_id]
+
+def _load_shard_directory():
+    """Reads the whole directory from the catalog; it is small (one row per project)."""
+    table = ProjectShard.__table__
+    with engine.connect() as conn:
+        rows = conn.execute(sa.select(table.c.project_code, table.c.shard_id).order_by(table.c.project_code)).all()
+    directory = {code: shard_id for code, shard_id in rows}
+    with _shard_lock:
+        _shard_directory.update(directory)
+    return directory
+
+def register_shard(project_code):
+    """Returns the shard engine for a project, allocating its file and schema on first use."""
+    table = ProjectShard.__table__
+    with write_transaction() as conn:
+        shard_id = conn.execute(sa.select(table.c.shard_id).where(table.c.project_code == project_code)).scalar()
+        if shard_id is None:
+            shard_id = (conn.execute(sa.select(sa.func.max(table.c.shard_id))).scalar() or 0) + 1
+            conn.execute(table.insert().values(project_code=project_code, shard_id=shard_id, created_at=datetime.utcnow().isoformat()))
+            # The schema exists before the directory row is committed, so no reader sees an empty file
+            _init_database(_shard_engine(shard_id))
+    bind = _shard_engine(shard_id)
+    with _shard_lock:
+        _shard_directory[project_code] = shard_id
+    return bind
+
+def _bind_for(project_code, create=False):
+    """The engine holding a project's rows: the main engine, its shard, or None for an unknown project."""
+    if not SHARD_DIR:
+        return engine
+    shard_id = _shard_directory.get(project_code)
+    if shard_id is None:
+        # Another process may have created the project since the directory was cached
+        table = ProjectShard.__table__
+        with engine.connect() as conn:
+            shard_id = conn.execute(sa.select(table.c.shard_id).where(table.c.project_code == project_code)).scalar()
+        if shard_id is None:
+            return register_shard(project_code) if create else None
+        with _shard_lock:
+            _shard_directory[project_code] = shard_id
+    return _shard_engine(shard_id)
+
+def project_binds(project_code=None):
+    """Engines to read project rows from: the project's shard, or every database holding projects."""
+    if not SHARD_DIR:
+        return [engine]
+    if project_code is not None:
+        bind = _bind_for(project_code)
+        return [bind] if bind is not None else []
+    return [_shard_engine(shard_id) for shard_id in _load_shard_directory().values()]
+
+def _group_by_bind(rows):
+    """Splits rows by the database their project_code routes to, creating shards as needed."""
+    if not SHARD_DIR:
+        return [(engine, rows)] if rows else []
+    by_code = {}
+    for row in rows:
+        by_code.setdefault(row["project_code"], []).append(row)
+    return [(_bind_for(code, create=True), code_rows) for code, code_rows in by_code.items()]
+
+def _reset_shards():
+    with _shard_lock:
+        for shard in _shard_engines.values():
+            shard.dispose()
+        _shard_engines.clear()
+        _shard_directory.clear()
+
+# --- Image Variants ---
+
+def image_has_variants(image_ref: str) -> bool:
     session = SessionLocal()
     try:
-        new_comment = Comment(
-            project_code=project_code,
-            client_name=client_name,
-            comment=comment_text,
-            created_at=datetime.utcnow().isoformat()
-        )
-        session.add(new_comment)
-        session.commit()
+        return session.query(ImageVariant.image_ref).filter(ImageVariant.image_ref == image_ref).first() is not None
     finally:
         session.close()
 
-def list_comments(project_code, limit=500):
+def add_image_variants(image_ref: str, variants: list):
+    """Stores each variant's bytes in the blob store and records it under image_ref, in one transaction."""
+    with write_transaction() as conn:
+        for v in variants:
+            sha = _put_blob_conn(conn, v["data"], v["mime_type"])
+            conn.execute(
+                sa.text("INSERT OR REPLACE INTO image_variants (image_ref, variant, width, height, blob_sha256) "
+                        "VALUES (:ref, :variant, :width, :height, :sha)"),
+                {"ref": image_ref, "variant": v["variant"], "width": v["width"], "height": v["height"], "sha": sha},
+            )
+
+def get_image_variant_ref(image_ref: str, min_width: int):
+    """
+    Returns the blob reference of the smallest variant at least min_width pixels wide,
+    or the largest variant if none is wide enough. Images stored before variants existed
+    are their own blob, so the reference is returned unchanged.
+    """
+    if not image_ref:
+        return None
     session = SessionLocal()
     try:
-        comments = session.query(Comment)\
-            .filter(Comment.project_code == project_code)\
-            .order_by(Comment.id.desc())\
-            .limit(limit).all()
-        # Return as list of dicts for pandas
-        return [{
-            "Client": c.client_name,
-            "Comment": c.comment,
-            "Timestamp (UTC)": c.created_at
-        } for c in comments]
+        variants = session.query(ImageVariant.width, ImageVariant.blob_sha256)\
+            .filter(ImageVariant.image_ref == image_ref)\
+            .order_by(ImageVariant.width).all()
     finally:
         session.close()
+    if not variants:
+        return image_ref
+    for width, sha in variants:
+        if width >= min_width:
+            return sha
+    return variants[-1][1]
@@ -0,0 +1,169 @@
+"""
+Streaming export of comments and project metrics to CSV, JSONL or Parquet.
+
+Rows are read from SQLite in chunks and written as they arrive, so memory stays flat
+regardless of table size when writing to a file. Used by the admin download and as a CLI:
+
+    python -m app.export comments --format csv --project P1 --since 2024-01-01 --until 2024-12-31 -o comments.csv
+    python -m app.export projects --format parquet -o projects.parquet
+
+Streamlit's download button needs the whole payload as bytes, so the admin download is built in
+memory and capped at WPU_EXPORT_MAX_MB; larger exports go through the CLI.
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+from datetime import date, timedelta
+import sqlalchemy as sa
+from app import db
+
+CHUNK_SIZE = 2000
+# Largest export the admin download builds in memory
+EXPORT_MAX_BYTES = int(float(os.environ.get("WPU_EXPORT_MAX_MB", 50)) * 1024 * 1024)
+FORMATS = {"csv": "text/csv", "jsonl": "application/x-ndjson", "parquet": "application/vnd.apache.parquet"}
+
+COMMENT_COLUMNS = ["id", "project_code", "client_name", "comment", "created_at"]
+PROJECT_COLUMNS = [
+    "project_code", "project_name", "title", "project_progress", "pending_rfi", "days_spent",
+    "model_review_link", "rfi_sheet_link", "alert_note", "current_progress", "next_week_plan", "updated_at",
+]
+
+
+class ExportTooLarge(ValueError):
+    """Raised when an in-memory export grows past its size cap."""
+
+
+class _CappedBuffer(io.BytesIO):
+    def __init__(self, max_bytes):
+        super().__init__()
+        self.max_bytes = max_bytes
+
+    def write(self, data):
+        if self.tell() + memoryview(data).nbytes > self.max_bytes:
+            raise ExportTooLarge(
+                f"Export is larger than {self.max_bytes // (1024 * 1024)} MB; narrow the filters or use python -m app.export."
+            )
+        return super().write(data)
+
+
+def _until_exclusive(until):
+    """created_at is an ISO string, so an inclusive end date becomes '< next day'."""
+    if isinstance(until, date):
+        return (until + timedelta(days=1)).isoformat()
+    return (date.fromisoformat(until) + timedelta(days=1)).isoformat()
+
+
+def _stream(statement, chunk_size, project_code=None):
+    # When sharded, each project's shard is streamed in turn
+    for bind in db.project_binds(project_code):
+        with bind.connect() as conn:
+            result = conn.execution_options(stream_results=True, yield_per=chunk_size).execute(statement)
+            for partition in result.mappings().partitions():
+                yield [dict(row) for row in partition]
+
+
+def iter_comments(project_code=None, since=None, until=None, chunk_size=CHUNK_SIZE):
+    """Yields lists of comment dicts (oldest first), at most chunk_size per list."""
+    table = db.Comment.__table__
+    statement = sa.select(*[table.c[name] for name in COMMENT_COLUMNS]).order_by(table.c.id)
+    if project_code:
+        statement = statement.where(table.c.project_code == project_code)
+    if since:
+        statement = statement.where(table.c.created_at >= str(since))
+    if until:
+        statement = statement.where(table.c.created_at < _until_exclusive(until))
+    return _stream(statement, chunk_size, project_code or None)
+
+
+def iter_projects(project_code=None, chunk_size=CHUNK_SIZE):
+    """Yields lists of project metric dicts; image references are left out."""
+    table = db.Project.__table__
+    statement = sa.select(*[table.c[name] for name in PROJECT_COLUMNS]).order_by(table.c.project_code)
+    if project_code:
+        statement = statement.where(table.c.project_code == project_code)
+    return _stream(statement, chunk_size, project_code or None)
+
+
+def write_csv(chunks, columns, out):
+    """columns are the selected SQLAlchemy columns; out is a binary file object."""
+    text = io.TextIOWrapper(out, encoding="utf-8", newline="", write_through=True)
+    writer = csv.DictWriter(text, fieldnames=[column.name for column in columns])
+    writer.writeheader()
+    for chunk in chunks:
+        writer.writerows(chunk)
+    text.detach()
+
+
+def write_jsonl(chunks, columns, out):
+    for chunk in chunks:
+        out.write("".join(json.dumps(row, ensure_ascii=False) + "\n" for row in chunk).encode("utf-8"))
+
+
+def _arrow_schema(pa, columns):
+    """Fixed from the column types, so a column that is all-null in the first chunk keeps its type."""
+    types = {int: pa.int64(), float: pa.float64(), bool: pa.bool_()}
+    return pa.schema([(column.name, types.get(column.type.python_type, pa.string())) for column in columns])
+
+
+def write_parquet(chunks, columns, out):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Parquet export requires pyarrow (pip install pyarrow).")
+    schema = _arrow_schema(pa, columns)
+    with pq.ParquetWriter(out, schema) as writer: # No rows still writes a valid file with the columns
+        for chunk in chunks:
+            writer.write_batch(pa.RecordBatch.from_pylist(chunk, schema=schema))
+
+
+WRITERS = {"csv": write_csv, "jsonl": write_jsonl, "parquet": write_parquet}
+
+
+def export(kind, fmt, out, project_code=None, since=None, until=None, chunk_size=CHUNK_SIZE):
+    """Streams comments or projects in the given format to a binary file object."""
+    if fmt not in WRITERS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    if kind == "comments":
+        chunks, table, names = iter_comments(project_code, since, until, chunk_size), db.Comment.__table__, COMMENT_COLUMNS
+    elif kind == "projects":
+        chunks, table, names = iter_projects(project_code, chunk_size), db.Project.__table__, PROJECT_COLUMNS
+    else:
+        raise ValueError(f"Unknown export kind: {kind}")
+    WRITERS[fmt](chunks, [table.c[name] for name in names], out)
+
+
+def export_bytes(kind, fmt, max_bytes=EXPORT_MAX_BYTES, **filters):
+    """Exports into memory (for st.download_button); raises ExportTooLarge past max_bytes."""
+    out = _CappedBuffer(max_bytes)
+    export(kind, fmt, out, **filters)
+    return out.getvalue()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export comments or project metrics.")
+    parser.add_argument("kind", choices=["comments", "projects"])
+    parser.add_argument("--format", choices=sorted(WRITERS), default="csv")
+    parser.add_argument("--project", help="Only this project code")
+    parser.add_argument("--since", help="Comments created on or after this date (YYYY-MM-DD)")
+    parser.add_argument("--until", help="Comments created on or before this date (YYYY-MM-DD)")
+    parser.add_argument("-o", "--output", help="Output file (default: stdout)")
+    args = parser.parse_args(argv)
+    db.init_db()
+
+    filters = {"project_code": args.project}
+    if args.kind == "comments":
+        filters.update(since=args.since, until=args.until)
+    if args.output:
+        with open(args.output, "wb") as out:
+            export(args.kind, args.format, out, **filters)
+    else:
+        export(args.kind, args.format, sys.stdout.buffer, **filters)
+        sys.stdout.buffer.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image, ImageOps, features
+from app.db import blob_sha256, image_has_variants, add_image_variants
+
+# Longest-edge caps for each variant. The carousel card is 250x150 CSS px, so 640 covers 2x displays;
+# "full" keeps the upload at screen resolution instead of the raw camera size.
+VARIANT_SIZES = {
+    "thumb": 256,
+    "carousel": 640,
+    "full": 2048,
+}
+
+# WebP is much smaller than JPEG for photos, but Pillow can be built without it
+USE_WEBP = features.check("webp")
+JPEG_QUALITY = 82
+WEBP_QUALITY = 80
+
+# Shared pool for multi-file uploads; Pillow releases the GIL while decoding/resizing/encoding
+_pool = ThreadPoolExecutor(max_workers=min(4, os.cpu_count() or 1), thread_name_prefix="image-ingest")
+
+
+def _encode(img):
+    """Re-encodes a PIL image, returning (bytes, mime_type)."""
+    buf = io.BytesIO()
+    if USE_WEBP:
+        img.save(buf, format="WEBP", quality=WEBP_QUALITY, method=4)
+        return buf.getvalue(), "image/webp"
+    if img.mode not in ("RGB", "L"):
+        img = img.convert("RGB")
+    img.save(buf, format="JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True)
+    return buf.getvalue(), "image/jpeg"
+
+
+def build_variants(file_bytes: bytes):
+    """Decodes an image once and returns the list of downscaled, re-encoded variants."""
+    with Image.open(io.BytesIO(file_bytes)) as source:
+        # JPEG can decode directly at a reduced scale that still covers the largest variant
+        largest = max(VARIANT_SIZES.values())
+        source.draft("RGB", (largest, largest))
+        # Apply the EXIF orientation so phone photos are not rendered sideways
+        img = ImageOps.exif_transpose(source)
+        if img.mode not in ("RGB", "RGBA", "L"):
+            img = img.convert("RGBA" if "A" in img.getbands() else "RGB")
+        img.load()
+
+    variants = []
+    # Build from largest to smallest so each resize works on an already-reduced image
+    for name, max_edge in sorted(VARIANT_SIZES.items(), key=lambda kv: kv[1], reverse=True):
+        if max(img.size) > max_edge:
+            img = img.copy()
+            img.thumbnail((max_edge, max_edge), Image.LANCZOS)
+        data, mime_type = _encode(img)
+        variants.append({
+            "variant": name,
+            "width": img.width,
+            "height": img.height,
+            "data": data,
+            "mime_type": mime_type,
+        })
+    return variants
+
+
+def ingest_image(file_bytes: bytes):
+    """
+    Stores the variants of an uploaded image and returns its reference (SHA-256 of the upload).
+    Re-uploading the same file is a no-op lookup.
+    """
+    image_ref = blob_sha256(file_bytes)
+    if not image_has_variants(image_ref):
+        add_image_variants(image_ref, build_variants(file_bytes))
+    return image_ref
+
+
+def ingest_images(files_bytes):
+    """Ingests several uploads in parallel, returning references in input order."""
+    return list(_pool.map(ingest_image, files_bytes))
@@ -0,0 +1,82 @@
+import os
+import time
+import threading
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+# Opt-in render instrumentation (WPU_PERF=1). Samples are kept per (project_code, section)
+# in a rolling window shared by all sessions of this process.
+PERF_ENABLED = os.environ.get("WPU_PERF", "0").lower() in ("1", "true", "yes")
+WINDOW = int(os.environ.get("WPU_PERF_WINDOW", 200))
+
+_samples = defaultdict(lambda: deque(maxlen=WINDOW)) # (project_code, section) -> deque[(seconds, bytes)]
+_lock = threading.Lock()
+
+
+def record(project_code, name, seconds, nbytes):
+    with _lock:
+        _samples[(project_code, name)].append((seconds, nbytes))
+
+
+@contextmanager
+def section(name, project_code=None):
+    """
+    Measures wall time and the bytes of every message sent to the browser while the block runs.
+    Bytes are counted by wrapping the script run context's outgoing message queue, so they are
+    exactly what goes over the websocket for this section. A no-op unless WPU_PERF is set.
+    """
+    if not PERF_ENABLED:
+        yield
+        return
+    ctx = get_script_run_ctx()
+    original = getattr(ctx, "_enqueue", None)
+    sent = [0]
+    if original is not None:
+        def counting_enqueue(msg):
+            sent[0] += msg.ByteSize()
+            original(msg)
+        ctx._enqueue = counting_enqueue
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        if original is not None:
+            ctx._enqueue = original
+        record(project_code, name, elapsed, sent[0])
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile (also used by the benchmarks, so both report the same figures)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def summary():
+    """Rolling percentiles per project and section, heaviest payloads first."""
+    with _lock:
+        snapshot = {key: list(samples) for key, samples in _samples.items() if samples}
+    rows = []
+    for (project_code, name), samples in snapshot.items():
+        seconds = [s for s, _ in samples]
+        sizes = [b for _, b in samples]
+        rows.append({
+            "Project": project_code,
+            "Section": name,
+            "Samples": len(samples),
+            "p50 ms": round(percentile(seconds, 50) * 1000, 2),
+            "p95 ms": round(percentile(seconds, 95) * 1000, 2),
+            "p50 KB": round(percentile(sizes, 50) / 1024, 1),
+            "p95 KB": round(percentile(sizes, 95) / 1024, 1),
+            "Max KB": round(max(sizes) / 1024, 1),
+        })
+    rows.sort(key=lambda r: r["p95 KB"], reverse=True)
+    return rows
+
+
+def reset():
+    with _lock:
+        _samples.clear()
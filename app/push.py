@@ -0,0 +1,261 @@
+"""
+Push service for new client comments: one poller watches SQLite and fans new comments out over
+Server-Sent Events to every subscribed admin view, so database polling stays constant no matter
+how many admin tabs are open.
+
+    WPU_PUSH_SECRET=... python -m app.push --port 8601
+    WPU_PUSH_SECRET=... python -m app.push listen --project P1   # print events (local testing)
+
+The Admin page embeds a live comments view that subscribes here when WPU_PUSH_URL and
+WPU_PUSH_SECRET are set for the Streamlit process (same secret for both); otherwise it keeps
+its polling refresh.
+
+    GET /events/comments?project=<code>&token=<token>&backlog=<n>
+        event: comment, id: <comment id>, data: {"id", "project_code", "client_name", "comment", "created_at"}
+        Reconnects resume from the Last-Event-ID header.
+"""
+import argparse
+import asyncio
+import hashlib
+import hmac
+import json
+import os
+import time
+from contextlib import asynccontextmanager
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+from app import db
+
+PUSH_URL = os.environ.get("WPU_PUSH_URL", "").rstrip("/")
+PUSH_SECRET = os.environ.get("WPU_PUSH_SECRET", "")
+POLL_SECONDS = float(os.environ.get("WPU_PUSH_POLL_SECONDS", 0.5))
+HEARTBEAT_SECONDS = 15
+TOKEN_TTL_SECONDS = 12 * 3600
+SUBSCRIBER_QUEUE_SIZE = 1000
+MAX_BACKLOG = 500
+
+
+def push_enabled():
+    return bool(PUSH_URL and PUSH_SECRET)
+
+
+def make_token(project_code, ttl=TOKEN_TTL_SECONDS, secret=None):
+    """Signed, expiring subscription token for one project (issued by the Admin page)."""
+    expires = int(time.time()) + ttl
+    payload = f"{project_code}:{expires}"
+    signature = hmac.new((secret or PUSH_SECRET).encode(), payload.encode(), hashlib.sha256).hexdigest()
+    return f"{expires}:{signature}"
+
+
+def check_token(project_code, token, secret=None):
+    expires, _, signature = (token or "").partition(":")
+    if not expires.isdigit() or int(expires) < time.time():
+        return False
+    payload = f"{project_code}:{expires}"
+    expected = hmac.new((secret or PUSH_SECRET).encode(), payload.encode(), hashlib.sha256).hexdigest()
+    return hmac.compare_digest(signature, expected)
+
+
+class CommentHub:
+    """
+    Single poller plus per-project subscriber queues. The poller keeps one cursor (the last comment
+    id it published) for the whole database, or one per subscribed project when the database is
+    sharded, since each shard has its own data_version and comment id range.
+    """
+
+    def __init__(self, poll_seconds=POLL_SECONDS):
+        self.poll_seconds = poll_seconds
+        self.subscribers = {} # project_code -> set of asyncio.Queue
+        self.cursors = {} # None (whole database) or project_code -> last published comment id
+        self.polls = 0 # Database queries for new comments, for the load test
+        self._task = None
+
+    @property
+    def last_id(self):
+        return max(self.cursors.values(), default=0)
+
+    async def start(self):
+        if not db.SHARD_DIR:
+            self.cursors[None] = await run_in_threadpool(db.get_latest_comment_id, None)
+        self._task = asyncio.create_task(self._poll())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+
+    async def track(self, project_code):
+        """When sharded, starts a cursor for a project's shard before its first subscriber is added."""
+        if db.SHARD_DIR and project_code not in self.cursors:
+            latest = await run_in_threadpool(db.get_latest_comment_id, project_code)
+            self.cursors.setdefault(project_code, latest)
+
+    def subscribe(self, project_code):
+        queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.subscribers.setdefault(project_code, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, project_code, queue):
+        queues = self.subscribers.get(project_code)
+        if queues:
+            queues.discard(queue)
+            if not queues:
+                del self.subscribers[project_code]
+                self.cursors.pop(project_code, None) # Sharded: stop polling an unwatched shard
+
+    async def _poll(self):
+        versions = {}
+        while True:
+            await asyncio.sleep(self.poll_seconds)
+            for source in list(self.cursors):
+                try:
+                    await self._poll_source(source, versions)
+                except Exception as e: # Keep the service up; the next change retries
+                    print(f"Comment poller error: {e}")
+
+    async def _poll_source(self, project_code, versions):
+        # data_version is a pragma read on a dedicated connection; only query on a change
+        current = await run_in_threadpool(db.data_version, project_code)
+        if versions.get(project_code) == current:
+            return
+        versions[project_code] = current
+        while project_code in self.cursors:
+            self.polls += 1
+            rows = await run_in_threadpool(db.list_new_comments, self.cursors[project_code], project_code)
+            for row in rows:
+                self.publish(row)
+            if rows and project_code in self.cursors:
+                self.cursors[project_code] = rows[-1]["id"]
+            if len(rows) < db.NEW_COMMENTS_PAGE:
+                break
+
+    def publish(self, row):
+        for queue in list(self.subscribers.get(row["project_code"], ())):
+            try:
+                queue.put_nowait(row)
+            except asyncio.QueueFull:
+                # A stalled client: drop it; it resumes from Last-Event-ID when it reconnects
+                self.unsubscribe(row["project_code"], queue)
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(None)
+
+
+hub = CommentHub()
+
+
+def _event(row):
+    return f"event: comment\nid: {row['id']}\ndata: {json.dumps(row, ensure_ascii=False)}\n\n"
+
+
+async def comment_events(request):
+    project_code = request.query_params.get("project", "")
+    if not check_token(project_code, request.query_params.get("token")):
+        return JSONResponse({"error": "Invalid or expired token."}, status_code=401)
+    try:
+        resume_id = int(request.headers.get("last-event-id") or 0)
+        backlog = min(MAX_BACKLOG, int(request.query_params.get("backlog") or 0))
+    except ValueError:
+        return JSONResponse({"error": "backlog and Last-Event-ID must be integers."}, status_code=400)
+
+    # Subscribe before reading the backlog so nothing committed in between is missed
+    await hub.track(project_code)
+    queue = hub.subscribe(project_code)
+
+    async def stream():
+        sent_id = 0
+        try:
+            if resume_id:
+                missed = await run_in_threadpool(db.list_new_comments, resume_id, project_code)
+            elif backlog:
+                missed = list(reversed(await run_in_threadpool(db.list_comments, project_code, None, None, backlog)))
+                missed = [{"id": r["id"], "project_code": project_code, "client_name": r["Client"],
+                           "comment": r["Comment"], "created_at": r["Timestamp (UTC)"]} for r in missed]
+            else:
+                missed = []
+            for row in missed:
+                sent_id = row["id"]
+                yield _event(row)
+            yield ": connected\n\n"
+            while True:
+                try:
+                    row = await asyncio.wait_for(queue.get(), HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        return
+                    yield ": heartbeat\n\n"
+                    continue
+                if row is None:
+                    return # Dropped for falling behind
+                if row["id"] > sent_id:
+                    sent_id = row["id"]
+                    yield _event(row)
+        finally:
+            hub.unsubscribe(project_code, queue)
+
+    headers = {
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no",
+        # The Admin page's live view is a sandboxed iframe; the token, not the origin, authorizes
+        "Access-Control-Allow-Origin": "*",
+    }
+    return StreamingResponse(stream(), media_type="text/event-stream", headers=headers)
+
+
+async def stats(request):
+    return JSONResponse({
+        "subscribers": sum(len(q) for q in hub.subscribers.values()),
+        "projects": len(hub.subscribers),
+        "polls": hub.polls,
+        "last_id": hub.last_id,
+    })
+
+
+@asynccontextmanager
+async def lifespan(_app):
+    if not PUSH_SECRET:
+        raise RuntimeError("Set WPU_PUSH_SECRET to run the push service.")
+    db.init_db()
+    await hub.start()
+    yield
+    await hub.stop()
+
+
+app = Starlette(
+    routes=[
+        Route("/events/comments", comment_events),
+        Route("/stats", stats),
+    ],
+    lifespan=lifespan,
+)
+
+
+def listen(url, project_code):
+    """Prints comment events for a project as they arrive."""
+    import urllib.parse
+    import urllib.request
+    query = urllib.parse.urlencode({"project": project_code, "token": make_token(project_code)})
+    with urllib.request.urlopen(f"{url}/events/comments?{query}") as response:
+        for line in response:
+            line = line.decode("utf-8").rstrip("\n")
+            if line.startswith("data: "):
+                print(line[6:], flush=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Push service for new client comments.")
+    parser.add_argument("command", nargs="?", choices=["serve", "listen"], default="serve")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8601)
+    parser.add_argument("--project", help="Project code to listen to")
+    args = parser.parse_args(argv)
+    if args.command == "listen":
+        listen(PUSH_URL or f"http://{args.host}:{args.port}", args.project)
+        return
+    import uvicorn
+    uvicorn.run(app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
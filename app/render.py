@@ -0,0 +1,122 @@
+import os
+from app.cache import LRUByteCache
+from app.utils import create_circular_meter, image_data_url
+from app.assets import icon_html, image_file_url
+
+# HTML for each client dashboard section, built once per (project_code, updated_at) and shared
+# by every session and rerun. A save changes updated_at, so stale versions simply age out.
+HTML_CACHE_MAX_BYTES = int(os.environ.get("WPU_HTML_CACHE_BYTES", 64 * 1024 * 1024))
+html_cache = LRUByteCache(HTML_CACHE_MAX_BYTES)
+
+LOGO_STYLE = "width:100px; height:auto; display:block; margin: 0 auto;"
+# Images per carousel page; only the visible page's images are resolved and sent
+CAROUSEL_PAGE_SIZE = int(os.environ.get("WPU_CAROUSEL_PAGE_SIZE", 6))
+
+
+def _logo_html(ref, fallback_html):
+    logo_url = image_data_url(ref, 200)
+    if logo_url:
+        # Use HTML to prevent Streamlit from wrapping the image in an undesired container size
+        return f'<img src="{logo_url}" style="{LOGO_STYLE}"/>'
+    return fallback_html
+
+
+def build_header(project):
+    return {
+        "client_logo": _logo_html(
+            project.get("client_logo_ref"),
+            '<div style="width:100px; height:100px; background:#111; border: 2px solid #333; border-radius:10px; display:flex; justify-content:center; align-items:center; font-size: 2em; margin: 0 auto;">🏢</div>',
+        ),
+        "project_name": f'<h1 style="text-align:center; color:#FF0000; margin-bottom: 0px;">{project["project_name"]}</h1>',
+        "title": f'<h2 style="text-align:center; color:#FFFFFF; margin-top: 0px;">{project["title"]}</h2>',
+        "kshitij_logo": _logo_html(project.get("kshitij_logo_ref"), icon_html("kshitij_logo", 100, "vertical-align: middle; margin-left: 8px;")),
+    }
+
+
+def build_meters(project):
+    meter_html = create_circular_meter(
+        label="Overall Progress",
+        value=project["project_progress"],
+        max_value=100,
+        color="#00C853", # Bright Green
+        size="250px"
+    )
+    # Ensure the meter is visually centered within its column
+    return {"progress": f'<div style="display:flex; justify-content:center;">{meter_html}</div>'}
+
+
+def _link_html(url, icon, label):
+    return f"""
+    <div class="transparent-circle-link">
+        <a href="{url}" target="_blank">
+            <div class="icon">{icon}</div>
+            {label}
+        </a>
+    </div>
+    """
+
+
+def build_links(project):
+    pieces = {}
+    if project.get("model_review_link"):
+        pieces["model_review"] = _link_html(project["model_review_link"], "💻", "Review Model")
+    if project.get("rfi_sheet_link"):
+        pieces["rfi_sheet"] = _link_html(project["rfi_sheet_link"], "🔗", "RFI Sheet")
+    if project.get("alert_note"):
+        # Alert Note (Emoji only, no red box)
+        pieces["alert"] = f"""
+        <div class="alert-box">
+            🚨 {project["alert_note"]}
+        </div>
+        """
+    return pieces
+
+
+def build_narrative(project):
+    roadmap_icon = icon_html("roadmap", 32, "vertical-align: middle; margin-right: 8px;")
+    return {
+        "current_progress_heading": f"<h4>{roadmap_icon} Current Progress</h4>",
+        "next_week_plan_heading": f"<h4>{roadmap_icon} Next Week Plan</h4>",
+    }
+
+
+def _carousel_image_html(ref):
+    # A static file URL (WPU_STATIC_IMAGES) lets the browser defer the download until the card scrolls into view
+    src = image_file_url(ref, 500) or image_data_url(ref, 500)
+    if not src:
+        return ""
+    return f'<div class="carousel-image-wrapper"><img src="{src}" loading="lazy" decoding="async" alt="Project Visual"/></div>'
+
+
+def carousel_pages(project, page_size=CAROUSEL_PAGE_SIZE):
+    return -(-len(project.get("carousel_image_refs") or []) // page_size)
+
+
+def carousel_page_html(project, page, page_size=CAROUSEL_PAGE_SIZE):
+    """HTML for one carousel page (0-based), cached per project version like the sections."""
+    key = (project["project_code"], project["updated_at"], "carousel", page, page_size)
+    html = html_cache.get(key)
+    if html is None:
+        refs = (project.get("carousel_image_refs") or [])[page * page_size:(page + 1) * page_size]
+        # Manually create the horizontal scrolling container using custom CSS; joined once, not +=
+        html = '<div class="image-carousel">' + "".join(_carousel_image_html(ref) for ref in refs) + '</div>'
+        html_cache.put(key, html, len(html))
+    return html
+
+
+SECTION_BUILDERS = {
+    "header": build_header,
+    "meters": build_meters,
+    "links": build_links,
+    "narrative": build_narrative,
+}
+
+
+def section_html(project, name):
+    """Returns the cached HTML pieces (a dict of strings) for one dashboard section."""
+    key = (project["project_code"], project["updated_at"], name)
+    pieces = html_cache.get(key)
+    if pieces is None:
+        pieces = SECTION_BUILDERS[name](project)
+        html_cache.put(key, pieces, sum(len(v) for v in pieces.values()))
+    return pieces
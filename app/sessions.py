@@ -0,0 +1,170 @@
+import os
+import sys
+import time
+import threading
+from streamlit.runtime import Runtime
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+# Per-session memory accounting. Every script run registers its session here, which lets any admin
+# see the bytes held by all sessions of this process and lets the budget below be enforced without
+# a background thread. Entries for sessions the runtime has closed are dropped on the next sweep.
+SESSION_BUDGET_BYTES = int(os.environ.get("WPU_SESSION_BUDGET_BYTES", 8 * 1024 * 1024))
+IDLE_EVICT_SECONDS = int(os.environ.get("WPU_SESSION_IDLE_SECONDS", 600))
+SWEEP_INTERVAL_SECONDS = int(os.environ.get("WPU_SESSION_SWEEP_SECONDS", 30))
+
+# Session state entries that are only a cache of database reads; dropping them makes the next
+# run fetch again. Everything else in session state is small (flags, codes, blob references).
+EVICTABLE_KEYS = ["comments_df", "comments_project_code", "comments_last_id", "comments_data_version"]
+
+_sessions = {} # session_id -> {"state": SessionState, "uploads", "ingested", "kind", "last_seen", "evicted"}
+_lock = threading.Lock()
+_last_sweep = [0.0]
+
+
+def value_bytes(value, _seen=None):
+    """Approximate deep size of a session state value in bytes."""
+    if _seen is None:
+        _seen = set()
+    if id(value) in _seen:
+        return 0
+    _seen.add(id(value))
+    if hasattr(value, "file_id") and hasattr(value, "size"):
+        return 0 # Uploaded files are counted once, from the upload manager
+    if hasattr(value, "memory_usage") and hasattr(value, "columns"): # DataFrame, without importing pandas
+        return int(value.memory_usage(deep=True).sum())
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(value_bytes(k, _seen) + value_bytes(v, _seen) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(value_bytes(v, _seen) for v in value)
+    return size
+
+
+def _upload_bytes(entry, session_id):
+    """(ingested, pending) upload bytes: uploads already in the blob store, and uploads that aren't yet."""
+    storage = getattr(entry["uploads"], "file_storage", None) # MemoryUploadedFileManager
+    if not storage:
+        return 0, 0
+    ingested = pending = 0
+    for file_id, rec in list(storage.get(session_id, {}).items()):
+        if file_id in entry["ingested"]:
+            ingested += len(rec.data)
+        else:
+            pending += len(rec.data)
+    return ingested, pending
+
+
+def _session_alive(session_id):
+    session_mgr = getattr(Runtime.instance(), "_session_mgr", None) if Runtime.exists() else None
+    if session_mgr is None:
+        return True # Bare mode (AppTest): there is no session manager to ask
+    return session_mgr.get_session_info(session_id) is not None
+
+
+def _measure(session_id, entry):
+    sizes = {key: value_bytes(value) for key, value in list(entry["state"].filtered_state.items())}
+    return (sizes, *_upload_bytes(entry, session_id))
+
+
+def _evict(session_id, entry, keys_only=False):
+    """Drops the cache-like keys and, unless keys_only, the already ingested raw uploads of one session."""
+    state = entry["state"]
+    for key in EVICTABLE_KEYS:
+        if key in state:
+            del state[key]
+    if not keys_only and hasattr(entry["uploads"], "remove_file"):
+        # Ingested uploads are in the blob store and the session keeps their references. Anything
+        # else (e.g. files picked in a form that hasn't been submitted yet) is left alone.
+        for file_id in entry["ingested"]:
+            entry["uploads"].remove_file(session_id, file_id)
+        entry["ingested"].clear()
+    entry["evicted"] = True
+
+
+def mark_ingested(uploaded_files):
+    """Records uploads of the current session whose bytes are now in the blob store."""
+    ctx = get_script_run_ctx()
+    if ctx is None:
+        return
+    with _lock:
+        entry = _sessions.get(ctx.session_id)
+        if entry is not None:
+            entry["ingested"].update(f.file_id for f in uploaded_files if f is not None)
+
+
+def touch(kind):
+    """Registers the current session for this run and evicts sessions that have gone idle."""
+    ctx = get_script_run_ctx()
+    if ctx is None:
+        return
+    now = time.monotonic()
+    with _lock:
+        entry = _sessions.get(ctx.session_id)
+        if entry is None:
+            entry = _sessions[ctx.session_id] = {
+                "state": ctx.session_state._state,
+                "uploads": ctx.uploaded_file_mgr,
+                "ingested": set(),
+                "evicted": False,
+            }
+        entry.update(kind=kind, last_seen=now, evicted=False) # Anything evicted is reloaded by this run
+        if now - _last_sweep[0] < SWEEP_INTERVAL_SECONDS:
+            return
+        _last_sweep[0] = now
+        for session_id, other in list(_sessions.items()):
+            if not _session_alive(session_id):
+                del _sessions[session_id]
+            elif not other["evicted"] and now - other["last_seen"] > IDLE_EVICT_SECONDS:
+                _evict(session_id, other)
+
+
+def enforce_budget():
+    """Called at the end of a run: trims the current session if it holds more than the budget."""
+    ctx = get_script_run_ctx()
+    if ctx is None or SESSION_BUDGET_BYTES <= 0:
+        return
+    with _lock:
+        entry = _sessions.get(ctx.session_id)
+        if entry is None:
+            return
+        # Pending uploads can't be released, so they don't count against the budget
+        sizes, uploads, _ = _measure(ctx.session_id, entry)
+        if sum(sizes.values()) + uploads > SESSION_BUDGET_BYTES:
+            _evict(ctx.session_id, entry, keys_only=True)
+            sizes, uploads, _ = _measure(ctx.session_id, entry)
+            if sum(sizes.values()) + uploads > SESSION_BUDGET_BYTES:
+                _evict(ctx.session_id, entry)
+
+
+def process_rss_bytes():
+    """Current resident set size from /proc (Linux), or None elsewhere."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def usage():
+    """One row per live session, largest first."""
+    now = time.monotonic()
+    with _lock:
+        entries = list(_sessions.items())
+    rows = []
+    for session_id, entry in entries:
+        if not _session_alive(session_id):
+            continue
+        sizes, uploads, pending = _measure(session_id, entry)
+        largest = max(sizes, key=sizes.get) if sizes else ""
+        rows.append({
+            "Session": session_id[:8],
+            "Kind": entry["kind"],
+            "Idle s": round(now - entry["last_seen"]),
+            "State KB": round(sum(sizes.values()) / 1024, 1),
+            "Uploads KB": round(uploads / 1024, 1),
+            "Pending Uploads KB": round(pending / 1024, 1),
+            "Largest Key": largest,
+            "Evicted": entry["evicted"],
+        })
+    rows.sort(key=lambda r: r["State KB"] + r["Uploads KB"] + r["Pending Uploads KB"], reverse=True)
+    return rows
@@ -0,0 +1,93 @@
+"""
+Splits an existing single-file database into per-project shards (see the Sharding section in
+app/db.py). Every project's rows are copied into its own shard file and registered in the
+catalog's project_shards directory; the copied rows are then removed from the main database,
+which keeps the image store and becomes the catalog.
+
+    python -m app.shards split --shard-dir data/shards
+    WPU_SHARD_DIR=data/shards streamlit run streamlit_app.py
+
+Comment ids are copied unchanged, so links and Last-Event-IDs stay valid; new comments in a shard
+are numbered from its own id range. The main database file keeps its size until it is VACUUMed.
+"""
+import argparse
+import os
+import sqlalchemy as sa
+from app import db
+
+BATCH_SIZE = 5000
+# Per-project tables, copied row for row into each shard
+PROJECT_TABLES = [
+    db.Project, db.Comment, db.ProjectSnapshot, db.ProjectSummary, db.CommentWeeklyRollup, db.CommentClientRollup,
+]
+
+
+def _copy_rows(source, target, table, project_code, batch_size):
+    statement = sa.select(table).where(table.c.project_code == project_code)
+    result = source.execution_options(yield_per=batch_size).execute(statement).mappings()
+    copied = 0
+    for rows in result.partitions():
+        target.execute(table.insert(), [dict(row) for row in rows])
+        copied += len(rows)
+    return copied
+
+
+def _copy_snapshot_texts(source, target, project_code):
+    """Snapshot texts are blobs in the shard's own store; images stay in the catalog's."""
+    snapshots = db.ProjectSnapshot.__table__
+    refs = source.execute(
+        sa.select(snapshots.c.text_ref).where(snapshots.c.project_code == project_code).distinct()
+    ).scalars().all()
+    for ref in refs:
+        blob = source.execute(sa.select(db.Blob.__table__).where(db.Blob.sha256 == ref)).mappings().first()
+        if blob:
+            target.execute(
+                sa.text("INSERT OR IGNORE INTO blobs (sha256, mime_type, size, data) VALUES (:sha256, :mime_type, :size, :data)"),
+                dict(blob),
+            )
+
+
+def split(shard_dir, batch_size=BATCH_SIZE, log=print):
+    """Moves every project's rows from the main database into shard files under shard_dir."""
+    # Bring the single-file schema up to date first (snapshots, summaries and rollups backfilled)
+    db.configure_engine(shard_dir="")
+    db.init_db()
+    db.configure_engine(shard_dir=os.path.abspath(shard_dir))
+    db.init_catalog()
+    if db.list_project_codes():
+        raise SystemExit(f"{db.engine.url.database} is already split into {db.SHARD_DIR}.")
+
+    with db.engine.connect() as conn:
+        codes = sorted(set(conn.execute(sa.text(
+            "SELECT project_code FROM projects UNION SELECT DISTINCT project_code FROM comments"
+        )).scalars()))
+    counts = {}
+    for code in codes:
+        bind = db.register_shard(code)
+        with db.engine.connect() as source, db.write_transaction(bind) as target:
+            counts[code] = {m.__tablename__: _copy_rows(source, target, m.__table__, code, batch_size) for m in PROJECT_TABLES}
+            _copy_snapshot_texts(source, target, code)
+        log(f"{code}: {counts[code]['comments']} comments -> {bind.url.database}")
+
+    # The catalog no longer serves these rows; its search index goes with them
+    with db.write_transaction() as conn:
+        for name in ("comments_fts_ai", "comments_fts_ad", "comments_fts_au"):
+            conn.execute(sa.text(f"DROP TRIGGER IF EXISTS {name}"))
+        conn.execute(sa.text("DROP TABLE IF EXISTS comments_fts"))
+        for model in reversed(PROJECT_TABLES):
+            conn.execute(model.__table__.delete())
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Per-project database shards.")
+    parser.add_argument("command", choices=["split"])
+    parser.add_argument("--shard-dir", default=db.SHARD_DIR or os.path.join(db.DATA_DIR, "shards"))
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args(argv)
+    counts = split(args.shard_dir, args.batch_size)
+    print(f"Split {len(counts)} projects into {args.shard_dir}. Set WPU_SHARD_DIR={args.shard_dir} to use them.")
+
+
+if __name__ == "__main__":
+    main()
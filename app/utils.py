@@ -1,6 +1,7 @@
 import streamlit as st
-import base64
-import pandas as pd
+from app.db import get_blob, blob_sha256, get_image_variant_ref
+from app.cache import get_blob_data_url
+from app import sessions
 
 def load_css(file_name):
     """Loads custom CSS file."""
@@ -12,16 +13,37 @@ def load_css(file_name):
         print(f"CSS file not found at {file_name}. Displaying without custom styles.")
 
 
-def get_base64_image_data(uploaded_file):
-    """Converts an uploaded file to a Base64 string suitable for HTML/CSS img src."""
+def store_uploaded_image(uploaded_file):
+    """Generates the resized variants of an uploaded image and returns its reference."""
     if uploaded_file is not None:
-        file_bytes = uploaded_file.getvalue()
-        base64_encoded = base64.b64encode(file_bytes).decode('utf-8')
-        mime_type = uploaded_file.type
-        # Return the complete data URL string
-        return f"data:{mime_type};base64,{base64_encoded}"
+        from app.images import ingest_image # Pillow and the worker pool load only when an admin uploads
+        ref = ingest_image(uploaded_file.getvalue())
+        sessions.mark_ingested([uploaded_file]) # The raw upload may now be released
+        return ref
     return None
 
+def store_uploaded_images(uploaded_files):
+    """Processes several uploads in the shared worker pool, returning references in order."""
+    from app.images import ingest_images
+    refs = ingest_images([f.getvalue() for f in uploaded_files])
+    sessions.mark_ingested(uploaded_files)
+    return refs
+
+def uploaded_file_ref(uploaded_file):
+    """Computes the blob reference an upload would get, without storing it."""
+    if uploaded_file is not None:
+        return blob_sha256(uploaded_file.getvalue())
+    return None
+
+def image_bytes(ref, min_width):
+    """Returns bytes of the smallest variant of an image that fits min_width (for st.image), or None."""
+    blob = get_blob(get_image_variant_ref(ref, min_width)) if ref else None
+    return blob["data"] if blob else None
+
+def image_data_url(ref, min_width):
+    """Returns the smallest variant of an image that fits min_width as a data URL, or None."""
+    return get_blob_data_url(get_image_variant_ref(ref, min_width))
+
 def roadmap_svg(size="32"): 
     """Returns a simple SVG icon for a roadmap/journey, used for Current Progress/Next Week Plan."""
     return f"""
@@ -0,0 +1,61 @@
+"""
+Benchmark suite: seeds a temp database, times the db layer and the Streamlit pages,
+and writes machine-readable JSON so runs can be compared over time.
+
+    python -m benchmarks --projects 20 --comments 2000 --images 8 --output bench.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    from benchmarks import seed, db_bench, app_bench
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    seed.add_arguments(parser)
+    parser.add_argument("--repeat", type=int, default=200, help="Calls per db function")
+    parser.add_argument("--reruns", type=int, default=20, help="Dashboard reruns per page")
+    parser.add_argument("--skip-app", action="store_true", help="Only benchmark the db layer")
+    parser.add_argument("--output", help="Write JSON results to this file (default: stdout)")
+    args = parser.parse_args(argv)
+    # The app resolves app/style.css relative to the working directory, as under `streamlit run`
+    os.chdir(REPO_ROOT)
+
+    db_path = seed.configure_temp_db()
+    started = time.perf_counter()
+    codes = seed.seed(args.projects, args.comments, args.images, (args.image_width, args.image_height))
+    results = {
+        "timestamp": datetime.utcnow().isoformat(),
+        "git_revision": git_revision(),
+        "python": platform.python_version(),
+        "params": vars(args) | {"db_path": db_path},
+        "seed_seconds": round(time.perf_counter() - started, 3),
+        "db": db_bench.run(codes, args.repeat),
+    }
+    if not args.skip_app:
+        results["app"] = app_bench.run(codes, args.reruns)
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
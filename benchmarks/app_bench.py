@@ -0,0 +1,70 @@
+"""Rerun latency and payload size of the Streamlit pages, driven through AppTest."""
+import os
+import time
+from streamlit.testing.v1 import AppTest
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "streamlit_app.py")
+
+
+def payload_bytes(at):
+    """Serialized size of every element the last run emitted (what goes over the websocket)."""
+    total = 0
+    stack = [at._tree]
+    while stack:
+        node = stack.pop()
+        children = getattr(node, "children", None)
+        if children:
+            stack.extend(children.values())
+        else:
+            proto = getattr(node, "proto", None)
+            if proto is not None and hasattr(proto, "ByteSize"):
+                total += proto.ByteSize()
+    return total
+
+
+def _timed_run(at, samples, sizes, action=None):
+    started = time.perf_counter()
+    (action() if action else at).run()
+    samples.append(time.perf_counter() - started)
+    sizes.append(payload_bytes(at))
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+
+
+def client_dashboard(project_code, reruns=20, timeout=60):
+    """Logs in as a client, then reruns the dashboard by toggling the review checkbox."""
+    at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+    at.run()
+    at.text_input(key="client_name_input").input("Bench Client")
+    at.text_input(key="client_code_input").input(project_code)
+    login, login_sizes = [], []
+    _timed_run(at, login, login_sizes, at.button[0].click)
+    samples, sizes = [], []
+    for i in range(reruns):
+        _timed_run(at, samples, sizes, at.checkbox(key="reviewed_checkbox").check if i % 2 == 0 else at.checkbox(key="reviewed_checkbox").uncheck)
+    return samples, sizes, login[0], login_sizes[0]
+
+
+def admin_panel(reruns=10, timeout=60):
+    """Opens the admin panel with live refresh off and measures plain reruns."""
+    at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+    at.session_state.admin_authenticated = True
+    at.run()
+    at.sidebar.radio[0].set_value("Admin Panel").run()
+    if at.toggle:
+        at.toggle[0].set_value(False).run()
+    samples, sizes = [], []
+    for _ in range(reruns):
+        _timed_run(at, samples, sizes)
+    return samples, sizes
+
+
+def run(codes, reruns=20):
+    from benchmarks.stats import summarize
+    samples, sizes, login_s, login_bytes = client_dashboard(codes[0], reruns)
+    admin_samples, admin_sizes = admin_panel(max(1, reruns // 2))
+    return {
+        "client_login": {"seconds": round(login_s, 4), "payload_bytes": login_bytes},
+        "client_rerun": {**summarize(samples), "payload_bytes_mean": sum(sizes) // len(sizes)},
+        "admin_rerun": {**summarize(admin_samples), "payload_bytes_mean": sum(admin_sizes) // len(admin_sizes)},
+    }
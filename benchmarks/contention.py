@@ -0,0 +1,123 @@
+"""
+Concurrent writer/reader contention check for the SQLite engine profile.
+
+Runs many threads doing add_comment / upsert_project writes alongside readers against a
+temporary database and reports throughput, latency and "database is locked" failures.
+
+    python -m benchmarks.contention --writers 16 --readers 16 --seconds 10
+    python -m benchmarks.contention --baseline   # pre-tuning defaults, for comparison
+    python -m benchmarks.contention --write-behind   # batch comments through app.comment_queue
+    python -m benchmarks.contention --sharded   # one SQLite file per project (WPU_SHARD_DIR)
+
+Exits non-zero if any operation failed with a lock error.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from benchmarks.stats import percentile
+
+# Rollback journal, no busy timeout: what the engine used before the tuned profile existed
+BASELINE_PRAGMAS = {"journal_mode": "DELETE", "synchronous": "FULL", "busy_timeout": "0"}
+
+
+def run(writers, readers, seconds, baseline=False, write_behind=False, sharded=False):
+    tmp_dir = tempfile.mkdtemp(prefix="wpu-contention-")
+    from app import db
+    db.configure_engine(
+        f"sqlite:///{os.path.join(tmp_dir, 'contention.db')}",
+        BASELINE_PRAGMAS if baseline else None,
+        shard_dir=os.path.join(tmp_dir, "shards") if sharded else "",
+    )
+    db.init_db()
+    db.COMMENT_WRITE_BEHIND = write_behind
+    codes = [f"P{i}" for i in range(4)]
+    for code in codes:
+        db.upsert_project({"project_code": code, "project_name": f"Project {code}"})
+
+    stop = threading.Event()
+    lock = threading.Lock()
+    stats = {"write": [], "read": [], "lock_errors": 0, "other_errors": 0}
+
+    def record(kind, started):
+        with lock:
+            stats[kind].append(time.perf_counter() - started)
+
+    def record_error(exc):
+        with lock:
+            if "database is locked" in str(exc) or "database is busy" in str(exc):
+                stats["lock_errors"] += 1
+            else:
+                stats["other_errors"] += 1
+
+    def writer(n):
+        i = 0
+        while not stop.is_set():
+            code = codes[(n + i) % len(codes)]
+            started = time.perf_counter()
+            try:
+                if i % 10 == 0:
+                    db.upsert_project({"project_code": code, "project_name": f"Project {code}", "project_progress": i % 101})
+                else:
+                    db.add_comment(code, f"writer-{n}", f"comment {i}")
+                record("write", started)
+            except Exception as exc:
+                record_error(exc)
+            i += 1
+
+    def reader(n):
+        i = 0
+        while not stop.is_set():
+            code = codes[(n + i) % len(codes)]
+            started = time.perf_counter()
+            try:
+                db.get_project_by_code(code)
+                db.list_comments(code, page_size=50)
+                record("read", started)
+            except Exception as exc:
+                record_error(exc)
+            i += 1
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(writers)]
+    threads += [threading.Thread(target=reader, args=(n,)) for n in range(readers)]
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+
+    result = {"profile": "baseline" if baseline else "tuned", "write_behind": write_behind, "sharded": sharded, "writers": writers, "readers": readers, "seconds": seconds}
+    for kind in ("write", "read"):
+        lat = stats[kind]
+        result[kind] = {
+            "ops": len(lat),
+            "ops_per_sec": round(len(lat) / seconds, 1),
+            "p50_ms": round(percentile(lat, 50) * 1000, 2),
+            "p99_ms": round(percentile(lat, 99) * 1000, 2),
+        }
+    result["lock_errors"] = stats["lock_errors"]
+    result["other_errors"] = stats["other_errors"]
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--writers", type=int, default=16)
+    parser.add_argument("--readers", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--baseline", action="store_true", help="Use the pre-tuning SQLite defaults")
+    parser.add_argument("--write-behind", action="store_true", help="Batch comments through the write-behind queue")
+    parser.add_argument("--sharded", action="store_true", help="Give each project its own database file")
+    args = parser.parse_args(argv)
+
+    result = run(args.writers, args.readers, args.seconds, args.baseline, args.write_behind, args.sharded)
+    print(json.dumps(result, indent=2))
+    return 1 if result["lock_errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,26 @@
+"""Timings for the app/db.py functions the app calls on every page view or save."""
+import random
+from app import db
+
+
+def run(codes, repeat=200):
+    from benchmarks.stats import summarize, time_calls
+    rng = random.Random(7)
+    pick = lambda i: (rng.choice(codes),)
+    results = {
+        "get_project_by_code": summarize(time_calls(db.get_project_by_code, repeat, pick)),
+        "list_project_codes": summarize(time_calls(db.list_project_codes, repeat)),
+        "list_comments": summarize(time_calls(db.list_comments, repeat, pick)),
+        "list_comments_incremental": summarize(time_calls(
+            lambda code: db.list_comments(code, after_id=2 ** 62), repeat, pick)),
+        "add_comment": summarize(time_calls(
+            lambda code: db.add_comment(code, "Bench Client", "Benchmark comment."), repeat, pick)),
+    }
+
+    def upsert(code):
+        project = dict(db.get_project_by_code(code))
+        project["project_progress"] = rng.randint(0, 100)
+        project.pop("id", None)
+        db.upsert_project(project)
+    results["upsert_project"] = summarize(time_calls(upsert, max(1, repeat // 4), pick))
+    return results
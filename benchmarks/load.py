@@ -0,0 +1,197 @@
+"""
+Concurrent-session load test: starts the app on a seeded temp database and, for each client count,
+runs that many simulated clients (log in, view the dashboard, tick the review checkbox, submit
+feedback, repeat) alongside admins with live refresh on. Reports throughput, rerun latency
+percentiles, server RSS and SQLite lock errors per step.
+
+    python -m benchmarks.load --clients 5 10 25 50 --admins 2 --seconds 30
+    python -m benchmarks.load --clients 25 --env WPU_COMMENT_WRITE_BEHIND=1 --max-p95-ms 500
+
+The simulated sessions run in this process, so on a small machine they share CPU with the server;
+compare runs made on the same host. Exits non-zero on any lock error, or when a step's overall p95
+exceeds --max-p95-ms.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from benchmarks import seed, ws_client
+from benchmarks.stats import summarize
+
+ADMIN_ACCESS_CODE = "k3masteraccess" # As in streamlit_app.py
+LOCK_MESSAGES = ("database is locked", "database is busy")
+ACTIONS = ["login", "view", "review", "submit", "admin_refresh"]
+
+
+class StepStats:
+    def __init__(self):
+        self.latency = {action: [] for action in ACTIONS}
+        self.lock_errors = 0
+        self.errors = 0
+        self.error_samples = []
+
+    def record(self, action, result):
+        self.latency[action].append(result.seconds)
+        for message in result.exceptions:
+            if any(text in message for text in LOCK_MESSAGES):
+                self.lock_errors += 1
+            else:
+                self.errors += 1
+            if len(self.error_samples) < 5:
+                self.error_samples.append(message[:200])
+
+    def failed(self, exc):
+        self.errors += 1
+        if len(self.error_samples) < 5:
+            self.error_samples.append(f"{type(exc).__name__}: {exc}"[:200])
+
+
+async def _client(port, index, code, stop, stats, think_seconds):
+    session = ws_client.Session(port)
+    try:
+        await session.connect()
+        # Stagger arrivals a little, as real logins would be
+        await asyncio.sleep(random.random())
+        result = await ws_client.client_login(session, code, name=f"Load Client {index}")
+        stats.record("login", result)
+        n = 0
+        while not stop.is_set():
+            page = await session.run()
+            stats.record("view", page)
+            page = await session.run([(page.find("checkbox", key="reviewed_checkbox"), True)])
+            stats.record("review", page)
+            text_area = page.find("text_area", key="user_comment")
+            button = page.find("button", key="submit_comment_btn")
+            if text_area is None or button is None:
+                raise RuntimeError("Feedback form not found on the dashboard")
+            result = await session.run([(text_area, f"Load test comment {index}-{n}")], trigger=button)
+            stats.record("submit", result)
+            n += 1
+            await asyncio.sleep(think_seconds * random.uniform(0.5, 1.5))
+    except Exception as exc:
+        stats.failed(exc)
+    finally:
+        await session.close()
+
+
+async def _admin(port, stop, stats, interval):
+    session = ws_client.Session(port)
+    try:
+        await session.connect()
+        result = await ws_client.admin_login(session, ADMIN_ACCESS_CODE)
+        stats.record("login", result)
+        if not session.auto_reruns:
+            raise RuntimeError("The admin page did not start a live refresh fragment")
+        while not stop.is_set():
+            # Rerun the live comments fragment on the timer a browser tab would run
+            for fragment_id, every in list(session.auto_reruns.items()):
+                await asyncio.sleep(interval or every)
+                if stop.is_set():
+                    break
+                stats.record("admin_refresh", await session.run(fragment_id=fragment_id))
+    except Exception as exc:
+        stats.failed(exc)
+    finally:
+        await session.close()
+
+
+async def _sample_rss(pid, stop, samples):
+    while not stop.is_set():
+        samples.append(ws_client.rss_bytes(pid))
+        await asyncio.sleep(0.5)
+
+
+def _count_lock_lines(log_path, offset):
+    with open(log_path, "rb") as f:
+        f.seek(offset)
+        text = f.read().decode("utf-8", "replace")
+    return sum(text.count(message) for message in LOCK_MESSAGES), offset + len(text.encode("utf-8"))
+
+
+async def _step(port, pid, codes, clients, admins, seconds, think_seconds, admin_interval):
+    stats = StepStats()
+    stop = asyncio.Event()
+    rss = []
+    tasks = [asyncio.create_task(_client(port, i, codes[i % len(codes)], stop, stats, think_seconds)) for i in range(clients)]
+    tasks += [asyncio.create_task(_admin(port, stop, stats, admin_interval)) for _ in range(admins)]
+    sampler = asyncio.create_task(_sample_rss(pid, stop, rss))
+    started = time.perf_counter()
+    await asyncio.sleep(seconds)
+    stop.set()
+    # Sessions finish their current action; anything still running after that is cut off
+    await asyncio.wait(tasks, timeout=30)
+    elapsed = time.perf_counter() - started
+    await sampler
+
+    reruns = [s for action in ACTIONS for s in stats.latency[action]]
+    return {
+        "clients": clients,
+        "admins": admins,
+        "seconds": round(elapsed, 1),
+        "reruns": len(reruns),
+        "reruns_per_sec": round(len(reruns) / elapsed, 1),
+        "submissions_per_sec": round(len(stats.latency["submit"]) / elapsed, 1),
+        "latency": {"all": summarize(reruns), **{a: summarize(s) for a, s in stats.latency.items() if s}},
+        "rss_mb_peak": round(max(rss) / 1024 / 1024, 1) if rss else None,
+        "rss_mb_end": round(ws_client.rss_bytes(pid) / 1024 / 1024, 1),
+        "lock_errors": stats.lock_errors,
+        "errors": stats.errors,
+        "error_samples": stats.error_samples,
+    }
+
+
+def run(client_steps=(5, 10, 25), admins=2, seconds=30, think_seconds=1.0, admin_interval=None,
+        projects=10, comments=2000, images=6, image_size=(1600, 1200), server_env=None):
+    db_path = seed.configure_temp_db()
+    codes = seed.seed(projects, comments, images, image_size)
+    log_path = os.path.join(tempfile.mkdtemp(prefix="wpu-load-"), "server.log")
+    process, port = ws_client.start_server({"WPU_DB_PATH": db_path, **(server_env or {})}, log_path=log_path)
+    results = {"db_path": db_path, "server_log": log_path, "server_env": server_env or {}, "steps": []}
+    try:
+        results["baseline_rss_mb"] = round(ws_client.rss_bytes(process.pid) / 1024 / 1024, 1)
+        offset = 0
+        for clients in client_steps:
+            step = asyncio.run(_step(port, process.pid, codes, clients, admins, seconds, think_seconds, admin_interval))
+            # Lock errors can also surface outside a script run (e.g. in a fragment or a background writer)
+            logged, offset = _count_lock_lines(log_path, offset)
+            step["server_log_lock_errors"] = logged
+            results["steps"].append(step)
+            print(json.dumps({k: step[k] for k in ("clients", "reruns_per_sec", "lock_errors", "errors")}
+                             | {"p95_ms": step["latency"]["all"].get("p95_ms"), "rss_mb_peak": step["rss_mb_peak"]}), file=sys.stderr)
+    finally:
+        process.terminate()
+        process.wait()
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clients", type=int, nargs="+", default=[5, 10, 25], help="Concurrent clients for each step")
+    parser.add_argument("--admins", type=int, default=2, help="Admin sessions with live refresh on")
+    parser.add_argument("--seconds", type=float, default=30, help="Duration of each step")
+    parser.add_argument("--think", type=float, default=1.0, help="Mean pause between a client's feedback cycles (s)")
+    parser.add_argument("--admin-interval", type=float, help="Live refresh period (default: the app's own)")
+    parser.add_argument("--projects", type=int, default=10)
+    parser.add_argument("--comments", type=int, default=2000, help="Comments per project")
+    parser.add_argument("--images", type=int, default=6, help="Carousel images per project")
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE", help="Extra server environment")
+    parser.add_argument("--max-p95-ms", type=float, help="Fail if any step's overall p95 exceeds this")
+    args = parser.parse_args(argv)
+    server_env = dict(item.split("=", 1) for item in args.env)
+    results = run(args.clients, args.admins, args.seconds, args.think, args.admin_interval,
+                  args.projects, args.comments, args.images, server_env=server_env)
+    print(json.dumps(results, indent=2))
+    steps = results["steps"]
+    if any(s["lock_errors"] or s["server_log_lock_errors"] for s in steps):
+        return 1
+    if args.max_p95_ms and any(s["latency"]["all"].get("p95_ms", 0) > args.max_p95_ms for s in steps):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
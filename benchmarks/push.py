@@ -0,0 +1,116 @@
+"""
+Fan-out check for the comment push service: starts app.push on a temp database, connects many
+local SSE subscribers, posts comments and reports delivery latency and how many times the service
+queried the database (which should not grow with the number of subscribers).
+
+    python -m benchmarks.push --subscribers 200 --comments 50
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.request
+from urllib.parse import urlencode
+from benchmarks import seed
+from benchmarks.stats import summarize
+from benchmarks.ws_client import REPO_ROOT, free_port
+
+SECRET = "benchmark-secret"
+
+
+async def _subscribe(port, project_code, token, received, ready):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    query = urlencode({"project": project_code, "token": token})
+    writer.write(f"GET /events/comments?{query} HTTP/1.1\r\nHost: 127.0.0.1\r\nAccept: text/event-stream\r\n\r\n".encode())
+    await writer.drain()
+    try:
+        while True:
+            line = (await reader.readline()).decode("utf-8")
+            if not line:
+                return
+            if line.startswith(": connected"):
+                ready.release()
+            elif line.startswith("data: "):
+                row = json.loads(line[6:])
+                received.append((row["id"], time.perf_counter()))
+    finally:
+        writer.close()
+
+
+async def _run(port, project_code, subscribers, comments, interval):
+    from app import db, push
+    token = push.make_token(project_code, secret=SECRET)
+    received = [[] for _ in range(subscribers)]
+    ready = asyncio.Semaphore(0)
+    tasks = [asyncio.create_task(_subscribe(port, project_code, token, received[i], ready)) for i in range(subscribers)]
+    for _ in range(subscribers):
+        await asyncio.wait_for(ready.acquire(), 30)
+
+    polls_before = _stats(port)["polls"]
+    sent = {}
+    for i in range(comments):
+        started = time.perf_counter()
+        await asyncio.to_thread(db.add_comment, project_code, "Load Client", f"Push check {i}")
+        sent[await asyncio.to_thread(db.get_latest_comment_id, project_code)] = started
+        await asyncio.sleep(interval)
+    await asyncio.sleep(2)
+    for task in tasks:
+        task.cancel()
+
+    latencies = [at - sent[cid] for events in received for cid, at in events if cid in sent]
+    return {
+        "subscribers": subscribers,
+        "comments": comments,
+        "delivered": len(latencies),
+        "expected": subscribers * comments,
+        "latency": summarize(latencies) if latencies else None,
+        "db_polls": _stats(port)["polls"] - polls_before,
+    }
+
+
+def _stats(port):
+    with urllib.request.urlopen(f"http://127.0.0.1:{port}/stats") as response:
+        return json.loads(response.read())
+
+
+def run(subscribers=200, comments=50, interval=0.05):
+    db_path = seed.configure_temp_db()
+    codes = seed.seed(1, 10, 1, (64, 48))
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "app.push", "--port", str(port)],
+        cwd=REPO_ROOT,
+        env={**os.environ, "WPU_DB_PATH": db_path, "WPU_PUSH_SECRET": SECRET},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                _stats(port)
+                break
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise RuntimeError("Push service did not start")
+                time.sleep(0.2)
+        return asyncio.run(_run(port, codes[0], subscribers, comments, interval))
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--subscribers", type=int, default=200)
+    parser.add_argument("--comments", type=int, default=50)
+    parser.add_argument("--interval", type=float, default=0.05, help="Seconds between comments")
+    args = parser.parse_args(argv)
+    print(json.dumps(run(args.subscribers, args.comments, args.interval), indent=2))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
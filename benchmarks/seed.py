@@ -0,0 +1,103 @@
+"""
+Seeds a database with synthetic projects, comments and images for benchmarking.
+
+    python -m benchmarks.seed --projects 20 --comments 2000 --images 8 --db /tmp/bench.db
+"""
+import argparse
+import io
+import os
+import random
+import tempfile
+from datetime import datetime, timedelta
+from PIL import Image
+
+# Phone-camera sized uploads; noise keeps JPEG sizes realistic (several MB at this resolution)
+IMAGE_SIZE = (4032, 3024)
+IMAGE_QUALITY = 85
+WORDS = "model clash review level slab beam column RFI drawing revision facade duct riser core".split()
+
+
+def make_image_bytes(seed, size=IMAGE_SIZE):
+    """Returns a JPEG of random noise over a gradient, roughly the size of a phone photo."""
+    rng = random.Random(seed)
+    width, height = size
+    base = Image.linear_gradient("L").resize(size).convert("RGB")
+    noise = Image.frombytes("RGB", size, rng.randbytes(width * height * 3))
+    img = Image.blend(base, noise, 0.5)
+    buf = io.BytesIO()
+    img.save(buf, format="JPEG", quality=IMAGE_QUALITY)
+    return buf.getvalue()
+
+
+def sentence(rng, n_words):
+    return " ".join(rng.choice(WORDS) for _ in range(n_words)).capitalize() + "."
+
+
+def configure_temp_db(path=None):
+    """Points app.db at a fresh database file (a temp file by default) and creates the schema."""
+    from app import db
+    path = path or os.path.join(tempfile.mkdtemp(prefix="wpu-bench-"), "bench.db")
+    db.configure_engine(f"sqlite:///{path}")
+    db.init_db()
+    return path
+
+
+def seed(projects=10, comments_per_project=500, images_per_project=6, image_size=IMAGE_SIZE, seed_value=42):
+    """Fills the configured database and returns the list of project codes."""
+    from app import db
+    from app.images import ingest_images
+    rng = random.Random(seed_value)
+    codes = [f"BENCH{i:03d}" for i in range(projects)]
+    # A small pool of distinct images shared across projects, as logos and site photos often are
+    pool = [make_image_bytes(seed_value + i, image_size) for i in range(max(images_per_project, 2))]
+    refs = ingest_images(pool)
+
+    for i, code in enumerate(codes):
+        db.upsert_project({
+            "project_code": code,
+            "project_name": f"Benchmark Tower {i}",
+            "title": "Weekly Project Update",
+            "project_progress": rng.randint(0, 100),
+            "pending_rfi": rng.randint(0, 40),
+            "days_spent": rng.randint(0, 400),
+            "model_review_link": "https://example.com/model",
+            "rfi_sheet_link": "https://example.com/rfi",
+            "alert_note": sentence(rng, 12),
+            "current_progress": " ".join(sentence(rng, 15) for _ in range(6)),
+            "next_week_plan": " ".join(sentence(rng, 15) for _ in range(6)),
+            "client_logo_ref": refs[0],
+            "kshitij_logo_ref": refs[1],
+            "carousel_image_refs": rng.sample(refs, images_per_project),
+        })
+        start = datetime.utcnow() - timedelta(days=365)
+        rows = [{
+            "project_code": code,
+            "client_name": f"Client {rng.randint(1, 25)}",
+            "comment": sentence(rng, rng.randint(5, 40)),
+            "created_at": (start + timedelta(minutes=j * 5)).isoformat(),
+        } for j in range(comments_per_project)]
+        for k in range(0, len(rows), 1000):
+            db.insert_comments(rows[k:k + 1000])
+    return codes
+
+
+def add_arguments(parser):
+    parser.add_argument("--projects", type=int, default=10)
+    parser.add_argument("--comments", type=int, default=500, help="Comments per project")
+    parser.add_argument("--images", type=int, default=6, help="Carousel images per project")
+    parser.add_argument("--image-width", type=int, default=IMAGE_SIZE[0])
+    parser.add_argument("--image-height", type=int, default=IMAGE_SIZE[1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    add_arguments(parser)
+    parser.add_argument("--db", help="Database file to create (default: a temp file)")
+    args = parser.parse_args(argv)
+    path = configure_temp_db(args.db)
+    codes = seed(args.projects, args.comments, args.images, (args.image_width, args.image_height))
+    print(f"Seeded {len(codes)} projects into {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Session memory load test: starts the app on a seeded temp database, opens client and admin
+sessions in steps and leaves them connected like idle browser tabs, then samples server RSS and
+the bytes held by sessions (as reported on the Admin page) after each step.
+
+    python -m benchmarks.sessions --sessions 200 --step 25
+    python -m benchmarks.sessions --no-evict   # accounting only, nothing released, for comparison
+"""
+import argparse
+import asyncio
+import json
+import sys
+from benchmarks import seed, ws_client
+
+ADMIN_ACCESS_CODE = "k3masteraccess" # As in streamlit_app.py
+
+
+async def _open(port, kind, code, limit):
+    async with limit:
+        session = ws_client.Session(port)
+        await session.connect()
+        if kind == "admin":
+            result = await ws_client.admin_login(session, ADMIN_ACCESS_CODE)
+        else:
+            result = await ws_client.client_login(session, code)
+        if result.exceptions:
+            raise RuntimeError(result.exceptions[0])
+        return session
+
+
+async def _measure(observer, pid):
+    result = await observer.run()
+    return {
+        "rss_mb": round(ws_client.rss_bytes(pid) / 1024 / 1024, 1),
+        "held_by_sessions": result.metric("Held by Sessions"),
+        "sessions_reported": result.metric("Sessions"),
+    }
+
+
+async def _load(port, pid, codes, total, step, admin_share, idle_seconds, concurrency):
+    limit = asyncio.Semaphore(concurrency)
+    observer = ws_client.Session(port)
+    await observer.connect()
+    await ws_client.admin_login(observer, ADMIN_ACCESS_CODE)
+    sessions, samples = [], []
+    try:
+        while len(sessions) < total:
+            batch = []
+            for i in range(len(sessions), min(total, len(sessions) + step)):
+                kind = "admin" if int((i + 1) * admin_share) > int(i * admin_share) else "client"
+                batch.append(_open(port, kind, codes[i % len(codes)], limit))
+            sessions.extend(await asyncio.gather(*batch))
+            # Let the new sessions go idle so the next sweep may release their heavy entries
+            await asyncio.sleep(idle_seconds + 1)
+            await observer.run() # Triggers the sweep
+            samples.append({"sessions": len(sessions), **await _measure(observer, pid)})
+            print(json.dumps(samples[-1]), file=sys.stderr)
+    finally:
+        for session in sessions + [observer]:
+            await session.close()
+    return samples
+
+
+def run(total=200, step=25, admin_share=0.5, evict=True, idle_seconds=2, projects=5, comments=2000, concurrency=8):
+    db_path = seed.configure_temp_db()
+    # Small images: this test is about session state, not image processing
+    codes = seed.seed(projects, comments, 2, (640, 480))
+    env = {"WPU_DB_PATH": db_path, "WPU_SESSION_SWEEP_SECONDS": "1"}
+    if evict:
+        env["WPU_SESSION_IDLE_SECONDS"] = str(idle_seconds)
+    else:
+        env.update(WPU_SESSION_IDLE_SECONDS=str(10 ** 9), WPU_SESSION_BUDGET_BYTES="0")
+    process, port = ws_client.start_server(env)
+    try:
+        baseline = round(ws_client.rss_bytes(process.pid) / 1024 / 1024, 1)
+        samples = asyncio.run(_load(port, process.pid, codes, total, step, admin_share, idle_seconds, concurrency))
+    finally:
+        process.terminate()
+        process.wait()
+    return {"evict": evict, "baseline_rss_mb": baseline, "samples": samples}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--step", type=int, default=25)
+    parser.add_argument("--admin-share", type=float, default=0.5, help="Fraction of sessions that are admins")
+    parser.add_argument("--no-evict", action="store_true", help="Disable the budget and idle eviction")
+    parser.add_argument("--projects", type=int, default=5)
+    parser.add_argument("--comments", type=int, default=2000, help="Comments per project")
+    args = parser.parse_args(argv)
+    results = run(args.sessions, args.step, args.admin_share, not args.no_evict, projects=args.projects, comments=args.comments)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
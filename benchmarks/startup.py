@@ -0,0 +1,116 @@
+"""
+Cold-start and per-rerun overhead of streamlit_app.py: import time of each layer in a fresh
+interpreter, the cost of init_db, and the fixed cost of a rerun on the client login page and the
+client dashboard (what every widget click pays before any page-specific work).
+
+    python -m benchmarks.startup --reruns 30
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from benchmarks import seed
+from benchmarks.stats import summarize
+from benchmarks.ws_client import REPO_ROOT
+
+# Each layer is imported on top of the previous ones, so the figure is that layer's own cost
+IMPORT_LAYERS = ["streamlit", "app.db", "app.client", "app.admin"]
+
+_IMPORT_PROBE = """
+import importlib, json, sys, time
+timings = {}
+for name in sys.argv[1:]:
+    started = time.perf_counter()
+    importlib.import_module(name)
+    timings[name] = time.perf_counter() - started
+print(json.dumps(timings))
+"""
+
+# Runs the client route once in a fresh interpreter and reports which heavy modules it loaded
+_ROUTE_PROBE = """
+import json, sys
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file(sys.argv[1], default_timeout=60)
+at.run()
+print(json.dumps({name: name in sys.modules for name in ["app.admin", "app.images", "app.bulk_import", "PIL.Image"]}))
+"""
+
+
+def _python(code, *args, env=None):
+    output = subprocess.run(
+        [sys.executable, "-c", code, *args], cwd=REPO_ROOT, env={**os.environ, **(env or {})},
+        check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def import_times(repeat=5):
+    """Median import time of each layer over several fresh interpreters."""
+    runs = [_python(_IMPORT_PROBE, *IMPORT_LAYERS) for _ in range(repeat)]
+    return {name: round(sorted(r[name] for r in runs)[len(runs) // 2] * 1000, 1) for name in IMPORT_LAYERS}
+
+
+def init_db_times(repeat=20):
+    """init_db on an existing database: the cost every rerun paid before it was cached per process."""
+    from app import db
+    seed.configure_temp_db() # Creates the schema
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        db.init_db()
+        samples.append(time.perf_counter() - started)
+    return summarize(samples)
+
+
+def rerun_overhead(project_code, reruns=30):
+    from streamlit.testing.v1 import AppTest
+    from benchmarks.app_bench import APP_PATH
+    at = AppTest.from_file(APP_PATH, default_timeout=60)
+    started = time.perf_counter()
+    at.run()
+    first_run = time.perf_counter() - started
+
+    login_page = []
+    for _ in range(reruns):
+        started = time.perf_counter()
+        at.run()
+        login_page.append(time.perf_counter() - started)
+
+    at.text_input(key="client_name_input").input("Bench Client")
+    at.text_input(key="client_code_input").input(project_code)
+    at.button[0].click().run()
+    dashboard = []
+    for _ in range(reruns):
+        started = time.perf_counter()
+        at.run()
+        dashboard.append(time.perf_counter() - started)
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+    return {
+        "first_run_ms": round(first_run * 1000, 3),
+        "login_page_rerun": summarize(login_page),
+        "dashboard_rerun": summarize(dashboard),
+    }
+
+
+def run(reruns=30, import_repeat=5):
+    results = {"import_ms": import_times(import_repeat), "init_db": init_db_times()}
+    db_path = seed.configure_temp_db()
+    codes = seed.seed(1, 200, 2, (640, 480))
+    results["client_route_loads"] = _python(_ROUTE_PROBE, os.path.join(REPO_ROOT, "streamlit_app.py"), env={"WPU_DB_PATH": db_path})
+    results["rerun"] = rerun_overhead(codes[0], reruns)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--reruns", type=int, default=30)
+    parser.add_argument("--import-repeat", type=int, default=5, help="Fresh interpreters per import timing")
+    args = parser.parse_args(argv)
+    print(json.dumps(run(args.reruns, args.import_repeat), indent=2))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
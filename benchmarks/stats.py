@@ -0,0 +1,27 @@
+import time
+from app.perf import percentile # Same percentiles as the admin Performance panel
+
+
+def summarize(samples):
+    """Summary of a list of durations in seconds, reported in milliseconds."""
+    if not samples:
+        return {"n": 0}
+    return {
+        "n": len(samples),
+        "mean_ms": round(sum(samples) / len(samples) * 1000, 3),
+        "p50_ms": round(percentile(samples, 50) * 1000, 3),
+        "p95_ms": round(percentile(samples, 95) * 1000, 3),
+        "p99_ms": round(percentile(samples, 99) * 1000, 3),
+        "max_ms": round(max(samples) * 1000, 3),
+    }
+
+
+def time_calls(fn, repeat, args_for=lambda i: ()):
+    """Calls fn(*args_for(i)) repeat times and returns the per-call durations."""
+    samples = []
+    for i in range(repeat):
+        args = args_for(i)
+        started = time.perf_counter()
+        fn(*args)
+        samples.append(time.perf_counter() - started)
+    return samples
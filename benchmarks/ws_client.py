@@ -0,0 +1,175 @@
+"""
+A minimal stand-in for a browser tab: one Streamlit websocket session that reruns the script
+with widget values and collects what the server sends back. Used by the load tests, which need
+many real sessions on a running server rather than AppTest's single in-process one.
+"""
+import os
+import subprocess
+import sys
+import time
+import socket
+import urllib.request
+import websockets
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RERUN_FINISH = ForwardMsg.DESCRIPTOR.fields_by_name["script_finished"].enum_type.values_by_name["FINISHED_EARLY_FOR_RERUN"].number
+
+# Widget proto -> WidgetState field carrying its value (radio and selectbox send the option label)
+VALUE_FIELDS = {
+    "TextInput": "string_value",
+    "TextArea": "string_value",
+    "Checkbox": "bool_value",
+    "Radio": "string_value",
+    "Selectbox": "string_value",
+}
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(env=None, port=None, timeout=60, log_path=None):
+    """
+    Starts `streamlit run streamlit_app.py` headless and waits for its health check.
+    log_path captures the server's output (e.g. to count lock errors); otherwise it is discarded.
+    """
+    port = port or free_port()
+    log = open(log_path, "ab") if log_path else subprocess.DEVNULL
+    process = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", "streamlit_app.py", "--server.port", str(port),
+         "--server.headless", "true", "--browser.gatherUsageStats", "false"],
+        cwd=REPO_ROOT,
+        env={**os.environ, **(env or {})},
+        stdout=log,
+        stderr=subprocess.STDOUT,
+    )
+    if log_path:
+        log.close() # The child keeps its own handle
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1):
+                return process, port
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError("Streamlit server did not start")
+
+
+def rss_bytes(pid):
+    """Resident set size of a process (Linux /proc)."""
+    with open(f"/proc/{pid}/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+class RunResult:
+    def __init__(self):
+        self.elements = [] # (element type, proto) in arrival order
+        self.bytes = 0
+        self.seconds = 0.0
+        self.exceptions = []
+
+    def find(self, kind, label=None, key=None):
+        for element_kind, proto in self.elements:
+            if element_kind != kind:
+                continue
+            if label is not None and getattr(proto, "label", None) != label:
+                continue
+            if key is not None and not getattr(proto, "id", "").endswith(f"-{key}"):
+                continue
+            return proto
+        return None
+
+    def metric(self, label):
+        proto = self.find("metric", label=label)
+        return proto.body if proto else None
+
+
+class Session:
+    """One websocket session. Widget values persist across runs, as in the browser."""
+
+    def __init__(self, port):
+        self.url = f"ws://127.0.0.1:{port}/_stcore/stream"
+        self.ws = None
+        self.widgets = {} # widget id -> (value field, value)
+        self.auto_reruns = {} # fragment id -> interval in seconds, as a browser's timers would hold
+        self.last = None
+
+    async def connect(self):
+        self.ws = await websockets.connect(self.url, max_size=None)
+
+    async def close(self):
+        if self.ws is not None:
+            await self.ws.close()
+
+    async def run(self, values=None, trigger=None, fragment_id=None):
+        """
+        Reruns the script. values is a list of (widget proto from a previous RunResult, new value);
+        trigger is a button or form submit button proto to press for this run only. fragment_id
+        reruns only that fragment, as the browser does for st.fragment(run_every=...).
+        """
+        for proto, value in values or []:
+            self.widgets[proto.id] = (VALUE_FIELDS[proto.DESCRIPTOR.name], value)
+        message = BackMsg()
+        message.rerun_script.query_string = ""
+        if fragment_id:
+            message.rerun_script.fragment_id = fragment_id
+            message.rerun_script.is_auto_rerun = True
+        for widget_id, (field, value) in self.widgets.items():
+            state = message.rerun_script.widget_states.widgets.add()
+            state.id = widget_id
+            setattr(state, field, value)
+        if trigger is not None:
+            state = message.rerun_script.widget_states.widgets.add()
+            state.id = trigger.id
+            state.trigger_value = True
+
+        result = RunResult()
+        started = time.perf_counter()
+        await self.ws.send(message.SerializeToString())
+        while True:
+            data = await self.ws.recv()
+            result.bytes += len(data)
+            msg = ForwardMsg()
+            msg.ParseFromString(data)
+            kind = msg.WhichOneof("type")
+            if kind == "delta" and msg.delta.WhichOneof("type") == "new_element":
+                element = msg.delta.new_element
+                element_kind = element.WhichOneof("type")
+                proto = getattr(element, element_kind)
+                result.elements.append((element_kind, proto))
+                if element_kind == "exception":
+                    result.exceptions.append(proto.message)
+            elif kind == "auto_rerun":
+                self.auto_reruns[msg.auto_rerun.fragment_id] = msg.auto_rerun.interval
+            elif kind == "stop_auto_rerun":
+                for fragment_id in msg.stop_auto_rerun.fragment_ids:
+                    self.auto_reruns.pop(fragment_id, None)
+            elif kind == "script_finished" and msg.script_finished != RERUN_FINISH:
+                break
+        result.seconds = time.perf_counter() - started
+        self.last = result
+        return result
+
+
+async def client_login(session, project_code, name="Load Client"):
+    """Opens the client view and logs in to a project dashboard."""
+    page = await session.run()
+    return await session.run(
+        [(page.find("text_input", key="client_name_input"), name), (page.find("text_input", key="client_code_input"), project_code)],
+        trigger=page.find("button", label="View Dashboard"),
+    )
+
+
+async def admin_login(session, access_code):
+    """Switches to the Admin Panel and logs in."""
+    page = await session.run()
+    page = await session.run([(page.find("radio", label="Navigate"), "Admin Panel")])
+    return await session.run(
+        [(page.find("text_input", key="admin_code_input"), access_code)],
+        trigger=page.find("button", label="Login"),
+    )
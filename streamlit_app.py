@@ -1,7 +1,6 @@
 import streamlit as st
-import app.client as client
-import app.admin as admin
 import app.db as db
+import app.sessions as sessions
 
 # --- Configuration & Initialization ---
 
@@ -16,8 +15,14 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
-# Initialize DB (Creates tables if not exist)
-db.init_db()
+# Initialize DB (Creates tables if not exist). Cached as a resource so the schema check, migrations
+# and backfills run once per server process instead of on every rerun.
+@st.cache_resource(show_spinner=False)
+def init_db_once():
+    db.init_db()
+    return True
+
+init_db_once()
 
 # --- Navigation and Routing ---
 
@@ -27,7 +32,13 @@ if "admin_authenticated" not in st.session_state:
 
 page = st.sidebar.radio("Navigate", ["Client View", "Admin Panel"])
 
+# Per-session memory accounting and idle eviction (app/sessions.py)
+sessions.touch("admin" if page == "Admin Panel" else "client")
+
+# Routes import their modules on first use, so client visitors never load the admin page's
+# dependencies (pandas, Pillow, export and import tooling)
 if page == "Client View":
+    import app.client as client
     client.app()
 
 elif page == "Admin Panel":
@@ -36,6 +47,7 @@ elif page == "Admin Panel":
 
     if st.session_state.admin_authenticated:
         st.sidebar.success("Authenticated.")
+        import app.admin as admin
         admin.app()
     else:
         # Authentication Form
@@ -52,3 +64,6 @@ elif page == "Admin Panel":
         
         if not st.session_state.admin_authenticated:
             st.warning("Access Denied. Please log in as an Admin in the sidebar.")
+
+# Trim this session if it is holding more than its memory budget
+sessions.enforce_budget()
@@ -0,0 +1,35 @@
+import os
+import pytest
+from app import db
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "streamlit_app.py")
+
+
+@pytest.fixture
+def temp_db(tmp_path):
+    """Points app.db at a fresh database file for one test."""
+    db.configure_engine(f"sqlite:///{tmp_path / 'test.db'}", shard_dir="")
+    db.init_db()
+    return tmp_path
+
+
+def add_project(code, **fields):
+    db.upsert_project({
+        "project_code": code,
+        "project_name": f"Project {code}",
+        "title": "Weekly Project Update",
+        "project_progress": 50,
+        "pending_rfi": 3,
+        "days_spent": 120,
+        **fields,
+    })
+
+
+def admin_app():
+    """AppTest of streamlit_app.py, logged in and on the Admin Panel."""
+    from streamlit.testing.v1 import AppTest
+    at = AppTest.from_file(APP_PATH, default_timeout=60)
+    at.session_state["admin_authenticated"] = True
+    at.run()
+    at.sidebar.radio[0].set_value("Admin Panel").run()
+    return at
@@ -0,0 +1,59 @@
+import io
+import json
+import socket
+import threading
+import time
+import urllib.request
+import pytest
+import uvicorn
+from PIL import Image
+from app import api
+from app.images import ingest_image
+from conftest import add_project
+
+
+@pytest.fixture
+def api_url(temp_db):
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(api.app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 10
+    while not server.started:
+        assert time.monotonic() < deadline, "API server did not start"
+        time.sleep(0.05)
+    yield f"http://127.0.0.1:{port}"
+    server.should_exit = True
+    thread.join(10)
+
+
+def _get(url, code):
+    request = urllib.request.Request(url, headers={"Authorization": f"Bearer {code}"})
+    with urllib.request.urlopen(request) as response:
+        return response.status, response.headers.get("Content-Type"), response.read()
+
+
+def _image(color):
+    buf = io.BytesIO()
+    Image.new("RGB", (800, 600), color).save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def test_image_urls_from_project_payload_resolve(api_url):
+    logo, photo = ingest_image(_image("red")), ingest_image(_image("blue"))
+    add_project("API1", client_logo_ref=logo, carousel_image_refs=[photo])
+
+    status, _, body = _get(f"{api_url}/api/project", "API1")
+    payload = json.loads(body)
+    urls = [payload["client_logo_url"], *payload["carousel_image_urls"]]
+    assert status == 200 and len(urls) == 2
+    for url in urls:
+        status, content_type, data = _get(url, "API1")
+        assert status == 200
+        assert content_type.startswith("image/") and data
+
+    # A bare image URL (no width) serves the dashboard size rather than a missing original
+    status, _, _ = _get(f"{api_url}/api/images/{photo}", "API1")
+    assert status == 200
@@ -0,0 +1,31 @@
+import io
+from PIL import Image
+from app import assets, render
+from app.images import ingest_image
+from conftest import add_project
+
+
+def _project_with_image():
+    buf = io.BytesIO()
+    Image.new("RGB", (800, 600), "green").save(buf, format="PNG")
+    ref = ingest_image(buf.getvalue())
+    add_project("AST1", carousel_image_refs=[ref])
+    return ref
+
+
+def test_carousel_images_are_inline_by_default(temp_db, monkeypatch):
+    monkeypatch.setattr(assets, "STATIC_IMAGES_DIR", str(temp_db / "images"))
+    ref = _project_with_image()
+    assert assets.image_file_url(ref, 500) is None
+    assert 'src="data:image/' in render._carousel_image_html(ref)
+    assert not (temp_db / "images").exists()
+
+
+def test_static_image_files_are_opt_in(temp_db, monkeypatch):
+    monkeypatch.setattr(assets, "STATIC_IMAGES", True)
+    monkeypatch.setattr(assets, "STATIC_IMAGES_DIR", str(temp_db / "images"))
+    monkeypatch.setattr(assets, "static_manifest", lambda: {"css": "app/static/assets/style.css"})
+    ref = _project_with_image()
+    url = assets.image_file_url(ref, 500)
+    assert url.startswith(assets.STATIC_IMAGES_URL + "/")
+    assert (temp_db / "images" / url.rsplit("/", 1)[1]).exists()
@@ -0,0 +1,48 @@
+import pytest
+from app import db
+from app.bulk_import import validate_rows
+
+
+def test_validate_rows_cleans_and_converts():
+    rows, errors = validate_rows([
+        {"project_code": " P1 ", "project_name": "Tower", "project_progress": "42.0", "pending_rfi": "", "unknown": "x"},
+    ])
+    assert errors == []
+    assert rows == [{"project_code": "P1", "project_name": "Tower", "project_progress": 42}]
+
+
+@pytest.mark.parametrize("value", ["abc", "inf", "-inf", "nan", "1e400"])
+def test_validate_rows_reports_bad_numbers_as_row_errors(value):
+    _, errors = validate_rows([{"project_code": "P1", "project_name": "Tower", "days_spent": value}])
+    assert errors == [f"Row 1: days_spent must be a number, got '{value}'."]
+
+
+def test_validate_rows_reports_missing_duplicate_and_range_errors():
+    _, errors = validate_rows([
+        {"project_code": "P1", "project_name": "Tower"},
+        {"project_code": "P1", "project_name": "Tower again"},
+        {"project_name": "No code"},
+        {"project_code": "P2", "project_name": "Tower", "project_progress": "150"},
+    ])
+    assert errors == [
+        "Row 2: duplicate project_code 'P1'.",
+        "Row 3: missing project_code.",
+        "Row 4: project_progress must be between 0 and 100, got 150.",
+    ]
+
+
+def test_bulk_upsert_counts(temp_db):
+    rows, _ = validate_rows([
+        {"project_code": "B1", "project_name": "One", "project_progress": "10"},
+        {"project_code": "B2", "project_name": "Two", "project_progress": "20"},
+    ])
+    assert db.bulk_upsert_projects(rows) == {"created": 2, "updated": 0, "unchanged": 0}
+
+    rows, _ = validate_rows([
+        {"project_code": "B1", "project_name": "One", "project_progress": "10"},
+        {"project_code": "B2", "project_name": "Two", "project_progress": "25"},
+        {"project_code": "B3", "project_name": "Three"},
+    ])
+    assert db.bulk_upsert_projects(rows) == {"created": 1, "updated": 1, "unchanged": 1}
+    assert db.get_project_by_code("B2")["project_progress"] == 25
+    assert db.get_project_by_code("B1")["project_name"] == "One"
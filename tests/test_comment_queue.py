@@ -0,0 +1,54 @@
+import threading
+import pytest
+from app import comment_queue, db
+from app.comment_queue import CommentWriter, CommentWriteTimeout
+
+
+def _submit_batch(writer, n):
+    return [writer.submit({"n": i}) for i in range(n)]
+
+
+def test_batch_that_fails_once_resolves_every_future():
+    calls = []
+
+    def write(rows):
+        calls.append(len(rows))
+        if len(calls) == 1:
+            raise RuntimeError("database is locked")
+
+    writer = CommentWriter(batch_ms=200, write_batch=write)
+    try:
+        futures = _submit_batch(writer, 3)
+        for future in futures:
+            assert future.result(timeout=5) is None
+    finally:
+        writer.close()
+    assert calls == [3, 1, 1, 1] # The failed batch is retried row by row
+
+
+def test_persistent_failure_sets_each_future_exception():
+    def write(rows):
+        raise ValueError("bad row")
+
+    writer = CommentWriter(batch_ms=200, write_batch=write)
+    try:
+        futures = _submit_batch(writer, 3)
+        for future in futures:
+            with pytest.raises(ValueError):
+                future.result(timeout=5)
+    finally:
+        writer.close()
+
+
+def test_add_comment_times_out_on_a_stalled_writer(monkeypatch):
+    release = threading.Event()
+    writer = CommentWriter(write_batch=lambda rows: release.wait(10))
+    monkeypatch.setattr(comment_queue, "_writer", writer)
+    monkeypatch.setattr(comment_queue, "COMMIT_TIMEOUT", 0.2)
+    monkeypatch.setattr(db, "COMMENT_WRITE_BEHIND", True)
+    try:
+        with pytest.raises(CommentWriteTimeout):
+            db.add_comment("P1", "Client", "Stuck comment")
+    finally:
+        release.set()
+        writer.close()
@@ -0,0 +1,61 @@
+import csv
+import io
+import pytest
+from streamlit.runtime.media_file_manager import MediaFileManager
+from streamlit.testing.v1 import app_test
+from app import db, export
+from conftest import add_project, admin_app
+
+
+def test_admin_download_button_builds_export(temp_db, monkeypatch):
+    add_project("EXP1")
+    db.add_comment("EXP1", "Client A", "First comment")
+    db.add_comment("EXP1", "Client B", "Second comment")
+
+    # Keep the test runtime's media file manager so the deferred download can be executed
+    managers = []
+
+    class RecordingMediaFileManager(MediaFileManager):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            managers.append(self)
+
+    monkeypatch.setattr(app_test, "MediaFileManager", RecordingMediaFileManager)
+    at = admin_app()
+    assert not at.exception
+
+    button = at.get("download_button")[0]
+    assert button.proto.label == "Download comments (CSV)"
+    manager = managers[-1]
+    url = manager.execute_deferred(button.proto.deferred_file_id)
+    payload = manager._storage.get_file(url.rsplit("/", 1)[-1].split(".")[0]).content
+
+    rows = list(csv.DictReader(io.StringIO(payload.decode("utf-8"))))
+    assert [row["comment"] for row in rows] == ["First comment", "Second comment"]
+
+
+def test_export_bytes_enforces_size_cap(temp_db):
+    add_project("EXP2")
+    for i in range(50):
+        db.add_comment("EXP2", "Client", f"Comment {i} " + "x" * 100)
+    with pytest.raises(export.ExportTooLarge):
+        export.export_bytes("comments", "jsonl", max_bytes=1024)
+
+
+def test_parquet_keeps_column_types_across_chunks(temp_db):
+    pq = pytest.importorskip("pyarrow.parquet")
+    # The first chunk has only nulls in alert_note; the second has a value
+    add_project("PQA", alert_note=None)
+    add_project("PQB", alert_note="Crane inspection due")
+    out = io.BytesIO()
+    export.export("projects", "parquet", out, chunk_size=1)
+    table = pq.read_table(io.BytesIO(out.getvalue()))
+    assert table.column("alert_note").to_pylist() == [None, "Crane inspection due"]
+    assert str(table.schema.field("project_progress").type) == "int64"
+
+
+def test_parquet_export_bytes_with_no_rows(temp_db):
+    pq = pytest.importorskip("pyarrow.parquet")
+    table = pq.read_table(io.BytesIO(export.export_bytes("comments", "parquet")))
+    assert table.num_rows == 0
+    assert table.schema.names == export.COMMENT_COLUMNS
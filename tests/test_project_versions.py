@@ -0,0 +1,65 @@
+import pytest
+import sqlalchemy as sa
+from app import db
+
+BASE = {
+    "project_code": "VER1", "project_name": "Tower", "title": "Weekly Project Update",
+    "project_progress": 40, "pending_rfi": 5, "days_spent": 100, "alert_note": "Crane inspection",
+}
+
+
+@pytest.fixture
+def statements(temp_db):
+    """SQL statements run against the database, captured from the engine."""
+    captured = []
+    listener = lambda conn, cursor, statement, *args: captured.append(statement)
+    sa.event.listen(db.engine, "before_cursor_execute", listener)
+    yield captured
+    sa.event.remove(db.engine, "before_cursor_execute", listener)
+
+
+def _snapshot_count():
+    with db.engine.connect() as conn:
+        return conn.execute(sa.text("SELECT COUNT(*) FROM project_snapshots WHERE project_code = 'VER1'")).scalar()
+
+
+def test_save_without_changes_writes_nothing(statements):
+    created = db.upsert_project(dict(BASE))
+    before = db.get_project_by_code("VER1")
+    snapshots = _snapshot_count()
+    statements.clear()
+
+    result = db.upsert_project(dict(BASE), expected_version=created["version"])
+    assert result == {"status": "unchanged", "version": created["version"], "changed": []}
+    assert not [s for s in statements if s.lstrip().upper().startswith(("INSERT", "UPDATE", "DELETE"))]
+    assert db.get_project_by_code("VER1") == before # Same version and updated_at
+    assert _snapshot_count() == snapshots
+
+
+def test_partial_update_writes_only_changed_columns(statements):
+    created = db.upsert_project(dict(BASE))
+    statements.clear()
+
+    result = db.upsert_project({**BASE, "project_progress": 55, "alert_note": "Cleared"}, expected_version=created["version"])
+    assert result == {"status": "updated", "version": created["version"] + 1, "changed": ["alert_note", "project_progress"]}
+    update = next(s for s in statements if s.lstrip().upper().startswith("UPDATE PROJECTS"))
+    set_clause = update.upper().split(" SET ")[1].split(" WHERE ")[0]
+    assert sorted(part.split("=")[0].strip() for part in set_clause.split(",")) == [
+        "ALERT_NOTE", "PROJECT_PROGRESS", "UPDATED_AT", "VERSION",
+    ]
+    stored = db.get_project_by_code("VER1")
+    assert (stored["project_progress"], stored["alert_note"], stored["pending_rfi"]) == (55, "Cleared", 5)
+
+
+def test_stale_version_raises_conflict_and_keeps_row(temp_db):
+    created = db.upsert_project(dict(BASE))
+    db.upsert_project({**BASE, "project_progress": 60}, expected_version=created["version"])
+    before = db.get_project_by_code("VER1")
+
+    with pytest.raises(db.ProjectVersionConflict) as conflict:
+        db.upsert_project({**BASE, "project_progress": 70}, expected_version=created["version"])
+    assert conflict.value.expected_version == created["version"]
+    assert db.get_project_by_code("VER1") == before
+
+    with pytest.raises(db.ProjectVersionConflict): # 0 means "must not exist yet"
+        db.upsert_project(dict(BASE), expected_version=0)
@@ -0,0 +1,36 @@
+import pytest
+from app import db
+from conftest import add_project
+
+
+def _search(text, **filters):
+    return [r["Comment"] for r in db.search_comments(text, **filters)["results"]]
+
+
+def test_comment_added_after_backfill_is_searchable(temp_db):
+    add_project("SRC1")
+    assert _search("facade") == []
+    db.add_comment("SRC1", "Client", "Facade mockup approved")
+    assert _search("facade") == ["Facade mockup approved"]
+    assert _search("moc") == ["Facade mockup approved"] # The last word matches as a prefix
+
+
+@pytest.mark.parametrize("text", ['"beam', 'beam"', "slab AND OR NOT", "NEAR(core", "riser: (duct)", "*", "-^", "it's 50% done!"])
+def test_punctuation_and_quotes_are_not_fts_syntax(temp_db, text):
+    add_project("SRC2")
+    db.add_comment("SRC2", "Client", "Beam and slab at the core riser")
+    db.search_comments(text) # Must not raise an FTS5 syntax error
+
+
+def test_bm25_ordering_and_project_filter(temp_db):
+    add_project("SRC3")
+    add_project("SRC4")
+    db.add_comment("SRC3", "Client", "Clash report for the level 3 ducts, see attached model and drawings for details")
+    db.add_comment("SRC3", "Client", "Clash clash clash")
+    db.add_comment("SRC4", "Client", "Clash on level 2")
+    assert _search("clash")[0] == "Clash clash clash"
+    assert _search("clash", project_code="SRC3") == [
+        "Clash clash clash",
+        "Clash report for the level 3 ducts, see attached model and drawings for details",
+    ]
+    assert _search("clash", project_code="SRC4") == ["Clash on level 2"]
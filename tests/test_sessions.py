@@ -0,0 +1,35 @@
+from streamlit.runtime.memory_uploaded_file_manager import MemoryUploadedFileManager
+from streamlit.runtime.state import SessionState
+from streamlit.runtime.uploaded_file_manager import UploadedFileRec
+from app import db, sessions
+from conftest import add_project, admin_app
+
+
+def test_eviction_keeps_uploads_not_yet_ingested():
+    uploads = MemoryUploadedFileManager("/_stcore/upload_file")
+    uploads.add_file("s1", UploadedFileRec("logo", "logo.png", "image/png", b"x" * 1000))
+    # Picked in the project form, which hasn't been submitted yet
+    uploads.add_file("s1", UploadedFileRec("photo", "photo.jpg", "image/jpeg", b"y" * 5000))
+    state = SessionState()
+    state["comments_df"] = "cached rows"
+    entry = {"state": state, "uploads": uploads, "ingested": {"logo"}, "evicted": False}
+
+    assert sessions._measure("s1", entry)[1:] == (1000, 5000)
+    sessions._evict("s1", entry)
+
+    assert list(uploads.file_storage["s1"]) == ["photo"]
+    assert "comments_df" not in state
+    assert sessions._measure("s1", entry)[1:] == (0, 5000)
+
+
+def test_comments_panel_survives_eviction_between_runs(temp_db):
+    add_project("SES1")
+    db.add_comment("SES1", "Client", "Looks good")
+    at = admin_app()
+    assert not at.exception
+    # An idle sweep dropped the cached frame but this session still holds the data version
+    del at.session_state["comments_df"]
+    at.run()
+    assert not at.exception
+    frames = [df.value for df in at.dataframe if "Comment" in df.value.columns]
+    assert frames and "Looks good" in frames[0]["Comment"].tolist()
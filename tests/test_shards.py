@@ -0,0 +1,67 @@
+import sqlite3
+import pytest
+from app import db, shards
+from app.cache import get_project, project_cache
+from conftest import add_project
+
+CODES = ["SHA", "SHB", "SHC"]
+
+
+def _snapshot():
+    project_cache.clear()
+    return {
+        "projects": {code: get_project(code) for code in CODES},
+        "comments": {code: db.list_comments(code) for code in CODES},
+        "search": {code: db.search_comments("clash", project_code=code)["results"] for code in CODES},
+        "search_all": sorted(r["id"] for r in db.search_comments("clash", page_size=100)["results"]),
+    }
+
+
+def _comment_ids(path):
+    with sqlite3.connect(path) as conn:
+        return {row[0] for row in conn.execute("SELECT id FROM comments")}
+
+
+@pytest.fixture
+def sharded(temp_db):
+    for i, code in enumerate(CODES):
+        add_project(code, alert_note=f"Note {i}")
+        for j in range(5):
+            db.add_comment(code, f"Client {j}", f"Clash {j} on level {i}" if j % 2 else f"Slab pour {j}")
+    before = _snapshot()
+    shards.split(temp_db / "shards", log=lambda message: None)
+    db.init_db() # App startup in sharded mode
+    yield before
+    db.configure_engine(shard_dir="")
+
+
+def test_split_keeps_reads_identical(sharded):
+    assert db.SHARD_DIR
+    assert _snapshot() == sharded
+    # The catalog no longer holds project rows
+    assert _comment_ids(db.engine.url.database) == set()
+
+
+def test_new_comments_stay_in_the_shard_id_range_and_file(sharded):
+    directory = db._load_shard_directory()
+    assert sorted(directory) == CODES and len(set(directory.values())) == len(CODES)
+    for code in CODES:
+        shard_id = directory[code]
+        db.add_comment(code, "Client", f"New clash for {code}")
+        new_id = db.get_latest_comment_id(code)
+        assert shard_id << db.COMMENT_ID_BITS <= new_id < (shard_id + 1) << db.COMMENT_ID_BITS
+        assert new_id in _comment_ids(db.shard_path(shard_id))
+        for other in CODES:
+            if other != code:
+                assert new_id not in _comment_ids(db.shard_path(directory[other]))
+    assert _comment_ids(db.engine.url.database) == set()
+
+
+def test_new_project_gets_its_own_shard(sharded):
+    add_project("SHD")
+    db.add_comment("SHD", "Client", "First clash")
+    shard_id = db._load_shard_directory()["SHD"]
+    assert shard_id not in [db._load_shard_directory()[code] for code in CODES]
+    with sqlite3.connect(db.shard_path(shard_id)) as conn:
+        assert conn.execute("SELECT project_code FROM projects").fetchall() == [("SHD",)]
+    assert db.search_comments("first", project_code="SHD")["results"][0]["Comment"] == "First clash"